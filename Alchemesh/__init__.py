@@ -26,6 +26,7 @@ import shutil
 import sys
 import subprocess
 import importlib
+import importlib.util
 import imp
 import bmesh
 import textwrap
@@ -34,6 +35,14 @@ from collections import namedtuple
 from mathutils import Vector
 from sys import platform
 from . import metahuman_tools as meta
+from . import dna_io
+from . import mesh_io
+from . import sampling
+from . import shape_keys
+from .rbf import make_rbf, fit_adaptive_rbf, PartitionOfUnityRBF, DEFAULT_MEMORY_FRACTION
+from .rbf_cache import RBFCache, cache_key
+from .parallel import create_executor, default_worker_count
+from .projection import get_surface_projection
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 preview_collections = {}
@@ -84,25 +93,9 @@ def build_and_install_package(package_name, env, target_dir):
 		shutil.move(package_dir, os.path.join(target_dir, package_name))
 	shutil.rmtree(temp_dir)
 
-def clone_and_import_module(module_name, package_name=None, global_name=None, github_url=None):
-	if package_name is None:
-		package_name = module_name
-	if global_name is None:
-		global_name = module_name
-	environ_copy = dict(os.environ)
-	environ_copy["PYTHONNOUSERSITE"] = "1"
-	blender_python = sys.executable
-	if not os.path.exists("PyGeM/setup.py"):
-		git.Git("PyGeM").clone(github_url)
-	os.chdir("PyGeM")
-	subprocess.check_call([blender_python, "-m", "pip", "install", "."], env=environ_copy)
-	os.chdir("..")
-	spec = importlib.util.find_spec(module_name)
-	if spec is None:
-		raise ImportError(f"Module {module_name} not found after installation")
-	module = importlib.util.module_from_spec(spec)
-	spec.loader.exec_module(module)
-	globals()[global_name] = module
+def dependencies_available():
+	# The retarget solver runs in-process and only needs NumPy and SciPy.
+	return all(importlib.util.find_spec(module_name) is not None for module_name in ("numpy", "scipy"))
 
 def update_progress(job_title, progress):
 	length = 60
@@ -113,196 +106,221 @@ def update_progress(job_title, progress):
 	sys.stdout.write(msg)
 	sys.stdout.flush()
 
-def create_rbf_parameters_file(src_obj, dest_obj, rbf_type, filename):
-	original_control_points = []
-	deformed_control_points = []
-	proxy_level = bpy.context.scene.ALCHEMESH_settings.proxy_level
-	for i, v in enumerate(src_obj.data.vertices):
-		if i % proxy_level == 0:
-			original_control_points.append(v.co)
-			deformed_control_points.append(dest_obj.data.vertices[i].co)
-	original_cp_str = "\n ".join(" ".join(f"{coord:.3f}" for coord in vert) for vert in original_control_points)
-	deformed_cp_str = "\n ".join(" ".join(f"{coord:.3f}" for coord in vert) for vert in deformed_control_points)
-	rbf_params = f"[Radial Basis Functions]\nbasis function: {rbf_type}\nradius: 0.5\n\n[Control points]\noriginal control points: {original_cp_str}\ndeformed control points: {deformed_cp_str}\n"
-	with open(filename, 'w') as file:
-		file.write(rbf_params)
+def get_rbf_cache_dir(settings):
+	if settings.cache_dir:
+		return bpy.path.abspath(settings.cache_dir)
+	if bpy.data.filepath:
+		return bpy.path.abspath("//alchemesh_cache")
+	return bpy.utils.user_resource('DATAFILES', path="alchemesh_cache", create=True)
+
+def get_rbf_cache(settings):
+	return RBFCache(get_rbf_cache_dir(settings), settings.cache_size * 1024 * 1024)
+
+def select_rbf_control_indices(src_obj, src_coords, dest_coords, settings):
+	if settings.control_point_mode == 'STRIDE':
+		return np.arange(0, len(src_coords), settings.proxy_level)
+	features = [np.empty(0, dtype=np.int64)]
+	if settings.keep_displacement_features:
+		features.append(sampling.displacement_feature_indices(src_coords, dest_coords, settings.displacement_feature_fraction))
+	if settings.keep_uv_seams:
+		features.append(mesh_io.get_seam_vertex_indices(src_obj))
+	if settings.keep_group_boundaries:
+		features.append(mesh_io.get_vertex_group_boundary_indices(src_obj))
+	feature_indices = np.unique(np.concatenate(features).astype(np.int64))
+	if settings.control_point_mode == 'ADAPTIVE':
+		# The coarse starting set; refinement adds the worst-fit vertices up to the control point count.
+		return np.sort(sampling.farthest_point_sample(src_coords, settings.adaptive_initial_count, feature_indices))
+	return sampling.select_control_indices(src_coords, dest_coords, settings.control_point_mode, settings.control_point_count, feature_indices)
+
+def create_rbf(src_obj, dest_obj, rbf_type):
+	settings = bpy.context.scene.ALCHEMESH_settings
+	proxy_level = settings.proxy_level
+	radius = settings.rbf_radius
+	src_coords = mesh_io.get_vertex_coordinates(src_obj)
+	dest_coords = mesh_io.get_vertex_coordinates(dest_obj)
+	cache = None
+	if settings.use_cache:
+		cache = get_rbf_cache(settings)
+		solver_params = {"solver_mode": settings.solver_mode, "control_point_mode": settings.control_point_mode}
+		if settings.control_point_mode != 'STRIDE':
+			solver_params.update(
+				control_point_count=settings.control_point_count,
+				keep_displacement_features=settings.keep_displacement_features,
+				displacement_feature_fraction=round(settings.displacement_feature_fraction, 6),
+				keep_uv_seams=settings.keep_uv_seams,
+				keep_group_boundaries=settings.keep_group_boundaries
+			)
+		if settings.control_point_mode == 'ADAPTIVE':
+			solver_params.update(
+				adaptive_max_error=round(settings.adaptive_max_error, 9),
+				adaptive_initial_count=settings.adaptive_initial_count,
+				adaptive_batch_size=settings.adaptive_batch_size
+			)
+		if settings.solver_mode == 'PARTITION':
+			solver_params.update(points_per_cell=settings.points_per_cell, cell_overlap=round(settings.cell_overlap, 6))
+		key = cache_key(src_coords, dest_coords, rbf_type, radius, proxy_level, **solver_params)
+		rbf = cache.load(key)
+		if rbf is not None:
+			print(f"Using cached RBF weights {key}")
+			return rbf
+	control_indices = select_rbf_control_indices(src_obj, src_coords, dest_coords, settings)
+	if settings.control_point_mode == 'ADAPTIVE':
+		rbf, control_indices = fit_adaptive_rbf(
+			src_coords,
+			dest_coords,
+			func=rbf_type,
+			radius=radius,
+			max_error=settings.adaptive_max_error,
+			initial_indices=control_indices,
+			batch_size=settings.adaptive_batch_size,
+			max_control_points=settings.control_point_count,
+			progress=lambda count, error: print(f"Adaptive RBF: {count} control points, max error {error:.6f}")
+		)
+	original_control_points = src_coords[control_indices]
+	deformed_control_points = dest_coords[control_indices]
+	print(f"Solving RBF with {len(control_indices)} control points")
+	if settings.solver_mode == 'PARTITION':
+		rbf = PartitionOfUnityRBF(
+			original_control_points,
+			deformed_control_points,
+			func=rbf_type,
+			radius=radius,
+			points_per_cell=settings.points_per_cell,
+			overlap=settings.cell_overlap,
+			workers=settings.worker_count,
+			use_processes=settings.use_process_pool
+		)
+	elif settings.control_point_mode != 'ADAPTIVE':
+		rbf = make_rbf(original_control_points, deformed_control_points, func=rbf_type, radius=radius)
+	if cache is not None:
+		cache.store(key, rbf)
+	return rbf
 
 def create_bone_mesh_from_armature(armature):
 	bpy.context.view_layer.objects.active = armature
 	mesh = bpy.data.meshes.new("BoneMesh")
 	new_object = bpy.data.objects.new("BoneMeshObject", mesh)
 	bpy.context.collection.objects.link(new_object)
-	bm = bmesh.new()
-	for bone in armature.data.bones:
-		head = (armature.matrix_world @ bone.head_local)
-		tail = (armature.matrix_world @ bone.tail_local)
-		head_vert = bm.verts.new(head)
-		tail_vert = bm.verts.new(tail)
-		bm.edges.new((head_vert, tail_vert))
-	bm.to_mesh(mesh)
-	bm.free()
+	coords = mesh_io.get_world_bone_coordinates(armature)
+	mesh.vertices.add(len(coords))
+	mesh.vertices.foreach_set("co", coords.astype(np.float32).ravel())
+	mesh.edges.add(len(coords) // 2)
+	mesh.edges.foreach_set("vertices", np.arange(len(coords), dtype=np.int32))
+	mesh.update()
 	return convert_bone_mesh_to_rbf_format(mesh)
 
 def convert_bone_mesh_to_rbf_format(bone_mesh):
-	x = np.array([v.co.x for v in bone_mesh.vertices])
-	y = np.array([v.co.y for v in bone_mesh.vertices])
-	z = np.array([v.co.z for v in bone_mesh.vertices])
-	mesh = np.array([x.ravel(), y.ravel(), z.ravel()])
-	return mesh.T
+	coords = np.empty(len(bone_mesh.vertices) * 3, dtype=np.float32)
+	bone_mesh.vertices.foreach_get("co", coords)
+	return coords.reshape(-1, 3).astype(np.float64)
 
 def get_bone_positions_as_flat_array(armature):
-	bone_positions = []
 	bpy.context.view_layer.objects.active = armature
 	bpy.ops.object.mode_set(mode='OBJECT')
-	for bone in armature.pose.bones:
-		head = armature.matrix_world @ bone.head
-		tail = armature.matrix_world @ bone.tail
-		bone_positions.extend([head.x, head.y, head.z, tail.x, tail.y, tail.z])
-	return np.array(bone_positions)
+	return mesh_io.get_world_bone_coordinates(armature).ravel()
 
 def create_bone_positions_mesh(armature_obj, chunk_size):
-	chunks = []
-	bone_positions = []
-	for bone in armature_obj.pose.bones:
-		head = armature_obj.matrix_world @ bone.head
-		tail = armature_obj.matrix_world @ bone.tail
-		bone_positions.append([head.x, head.y, head.z])
-		bone_positions.append([tail.x, tail.y, tail.z])
-		if len(bone_positions) >= chunk_size:
-			chunks.append(np.array(bone_positions))
-			bone_positions = []
-	if bone_positions:
-		chunks.append(np.array(bone_positions))
-	np.set_printoptions(threshold=sys.maxsize)
-	return chunks
-
-def rbf_armature(armature_obj, chunk_size):
-	from PyGeM import pygem
-	from pygem import RBF
-	rbf = RBF()
-	rbf.read_parameters(filename='rbf_parameters.txt')
-	bone_positions = []
-	deformed_bones = []
-	numBones = len(armature_obj.pose.bones)
-	for i, bone in enumerate(armature_obj.pose.bones):
-		head = armature_obj.matrix_world @ bone.head
-		tail = armature_obj.matrix_world @ bone.tail
-		bone_positions.append([head.x, head.y, head.z])
-		bone_positions.append([tail.x, tail.y, tail.z])
-		if len(bone_positions) >= chunk_size:
-			deformed_chunk = rbf(np.array(bone_positions))
-			deformed_bones.append(deformed_chunk)
-			bone_positions = []
-		update_progress("Morphing Bones", i / numBones)
-	if bone_positions:
-		deformed_chunk = rbf(np.array(bone_positions))
-		deformed_bones.append(deformed_chunk)
-	deformed_bones = np.concatenate(deformed_bones).flatten()
-	np.set_printoptions(threshold=sys.maxsize)
-	return deformed_bones
-
-def rbf_mesh(mesh_obj, chunk_size):
-	from PyGeM import pygem
-	from pygem import RBF
-	rbf = RBF()
-	rbf.read_parameters(filename='rbf_parameters.txt')
-	vertex_positions = []
-	deformed_vertices = []
-	num_vertices = len(mesh_obj.data.vertices)
-	for i, vertex in enumerate(mesh_obj.data.vertices):
-		world_pos = mesh_obj.matrix_world @ vertex.co
-		vertex_positions.append([world_pos.x, world_pos.y, world_pos.z])
-		if len(vertex_positions) >= chunk_size:
-			deformed_chunk = rbf(np.array(vertex_positions))
-			deformed_vertices.append(deformed_chunk)
-			vertex_positions = []
-		update_progress("Morphing Vertices", i / num_vertices)
-	if vertex_positions:
-		deformed_chunk = rbf(np.array(vertex_positions))
-		deformed_vertices.append(deformed_chunk)
-	deformed_vertices = np.concatenate(deformed_vertices).flatten()
-	return deformed_vertices
-
-def update_mesh_vertex_positions_from_array(mesh_obj, deformed_mesh):
-	deformed_mesh = deformed_mesh.reshape(-1, 3)
-	bpy.context.view_layer.objects.active = mesh_obj
-	bpy.ops.object.mode_set(mode='EDIT')
-	bm = bmesh.from_edit_mesh(mesh_obj.data)
-	for i, vertex in enumerate(bm.verts):
-		new_pos = deformed_mesh[i]
-		new_pos_vec = Vector((new_pos[0], new_pos[1], new_pos[2]))
-		vertex.co = mesh_obj.matrix_world.inverted() @ new_pos_vec
-	bmesh.update_edit_mesh(mesh_obj.data)
-	bpy.ops.object.mode_set(mode='OBJECT')
+	bone_positions = mesh_io.get_world_bone_coordinates(armature_obj)
+	return [bone_positions[start:start + chunk_size] for start in range(0, len(bone_positions), chunk_size)]
+
+def rbf_armature(armature_obj, rbf):
+	bone_positions = mesh_io.get_world_bone_coordinates(armature_obj)
+	deformed_bones = rbf(bone_positions, progress=lambda progress: update_progress("Morphing Bones", progress))
+	return deformed_bones.flatten()
+
+def rbf_mesh(mesh_obj, rbf):
+	world_positions = mesh_io.get_world_vertex_coordinates(mesh_obj)
+	deformed_vertices = rbf(world_positions, progress=lambda progress: update_progress("Morphing Vertices", progress))
+	return deformed_vertices.flatten()
+
+def update_mesh_vertex_positions_from_array(mesh_obj, deformed_mesh, shape_key_name=None):
+	mesh_io.set_world_vertex_coordinates(mesh_obj, deformed_mesh.reshape(-1, 3), shape_key_name)
+	if shape_key_name:
+		mesh_obj.data.shape_keys.key_blocks[shape_key_name].value = 1.0
 
 def update_bone_positions_from_array(armature, deformed_mesh):
-	deformed_mesh = deformed_mesh.reshape(-1, 3)
 	bpy.context.view_layer.objects.active = armature
 	bpy.ops.object.mode_set(mode='EDIT')
-	for i, bone in enumerate(armature.data.edit_bones):
-		head_idx = 2 * i
-		tail_idx = head_idx + 1
-		head = deformed_mesh[head_idx]
-		tail = deformed_mesh[tail_idx]
-		head_vec = Vector((head[0], head[1], head[2]))
-		tail_vec = Vector((tail[0], tail[1], tail[2]))
-		bone.head = armature.matrix_world.inverted() @ head_vec
-		bone.tail = armature.matrix_world.inverted() @ tail_vec
+	mesh_io.set_world_edit_bone_coordinates(armature, deformed_mesh.reshape(-1, 3))
 	bpy.ops.object.mode_set(mode='OBJECT')
 
-def create_retargeted_armature(src_obj, dest_obj, rbf_type):
-	from PyGeM import pygem
-	from pygem import RBF
-	scene = bpy.context.scene
-	create_rbf_parameters_file(src_obj, dest_obj, rbf_type, "rbf_parameters.txt")
-	for item in scene.deform_objects:
-		if item.object is None:
-			continue
-		obj = item.object
+def evaluate_deform_objects(rbf, objects, executor, workers):
+	# Positions are read on the main thread; only the NumPy evaluation runs in the pool. Each evaluation
+	# sizes its blocks from free RAM, so the budget is split between the evaluations running at once.
+	memory_fraction = DEFAULT_MEMORY_FRACTION / max(1, min(workers, len(objects)))
+	futures = []
+	for obj in objects:
 		if obj.type == 'ARMATURE':
-			armature_obj = obj
-			bpy.ops.object.select_all(action='DESELECT')
-			armature_obj.select_set(True)
-			bpy.context.view_layer.objects.active = armature_obj
-			deformed_bones = rbf_armature(armature_obj, chunk_size=100)
-			original_target_location = dest_obj.location.copy()
-			src_armature_matrix_world = armature_obj.matrix_world.copy()
-			src_mesh_matrix_world = src_obj.matrix_world.copy()
-			relative_transform = src_armature_matrix_world.inverted() @ src_mesh_matrix_world
-			dest_obj.location = relative_transform.to_translation()
-			bpy.ops.object.parent_clear(type='CLEAR_KEEP_TRANSFORM')
-			bpy.ops.object.duplicate()
-			retargeted_armature = bpy.context.view_layer.objects.active
-			retargeted_armature.name = armature_obj.name + "_retarg"
-			bpy.ops.object.select_all(action='DESELECT')
-			dest_obj.select_set(True)
-			retargeted_armature.select_set(True)
-			bpy.context.view_layer.objects.active = retargeted_armature
-			bpy.ops.object.parent_set(type='OBJECT')
-			update_bone_positions_from_array(retargeted_armature, deformed_bones)
-			retargeted_armature.location = original_target_location
-			bpy.ops.object.select_all(action='DESELECT')
-			arm_mod = None
-			for mod in dest_obj.modifiers:
-				if mod.type == 'ARMATURE':
-					arm_mod = mod
-					break
-			if arm_mod is None:
-				arm_mod = dest_obj.modifiers.new(name="Armature", type='ARMATURE')
-			arm_mod.object = retargeted_armature
-			arm_mod.use_vertex_groups = True
-		elif obj.type == 'MESH':
-			bpy.ops.object.select_all(action='DESELECT')
-			obj.select_set(True)
-			bpy.context.view_layer.objects.active = obj
-			bpy.ops.object.duplicate()
-			duplicated_mesh = bpy.context.view_layer.objects.active
-			duplicated_mesh.name = obj.name + "_retarg"
-			deformed_vertices = rbf_mesh(duplicated_mesh, chunk_size=5)
-			update_mesh_vertex_positions_from_array(duplicated_mesh, deformed_vertices)
-			original_target_location = dest_obj.location
-			relative_position = obj.location - src_obj.location
-			duplicated_mesh.location = dest_obj.location + relative_position
+			positions = mesh_io.get_world_bone_coordinates(obj)
+		else:
+			positions = mesh_io.get_world_vertex_coordinates(obj)
+		futures.append(executor.submit(rbf, positions, memory_fraction=memory_fraction))
+	return futures
+
+def retarget_deform_object(src_obj, dest_obj, obj, deformed_positions, settings):
+	if obj.type == 'ARMATURE':
+		armature_obj = obj
+		bpy.ops.object.select_all(action='DESELECT')
+		armature_obj.select_set(True)
+		bpy.context.view_layer.objects.active = armature_obj
+		original_target_location = dest_obj.location.copy()
+		src_armature_matrix_world = armature_obj.matrix_world.copy()
+		src_mesh_matrix_world = src_obj.matrix_world.copy()
+		relative_transform = src_armature_matrix_world.inverted() @ src_mesh_matrix_world
+		dest_obj.location = relative_transform.to_translation()
+		bpy.ops.object.parent_clear(type='CLEAR_KEEP_TRANSFORM')
+		bpy.ops.object.duplicate()
+		retargeted_armature = bpy.context.view_layer.objects.active
+		retargeted_armature.name = armature_obj.name + "_retarg"
+		bpy.ops.object.select_all(action='DESELECT')
+		dest_obj.select_set(True)
+		retargeted_armature.select_set(True)
+		bpy.context.view_layer.objects.active = retargeted_armature
+		bpy.ops.object.parent_set(type='OBJECT')
+		update_bone_positions_from_array(retargeted_armature, deformed_positions)
+		retargeted_armature.location = original_target_location
+		bpy.ops.object.select_all(action='DESELECT')
+		arm_mod = None
+		for mod in dest_obj.modifiers:
+			if mod.type == 'ARMATURE':
+				arm_mod = mod
+				break
+		if arm_mod is None:
+			arm_mod = dest_obj.modifiers.new(name="Armature", type='ARMATURE')
+		arm_mod.object = retargeted_armature
+		arm_mod.use_vertex_groups = True
+	elif obj.type == 'MESH':
+		bpy.ops.object.select_all(action='DESELECT')
+		obj.select_set(True)
+		bpy.context.view_layer.objects.active = obj
+		bpy.ops.object.duplicate()
+		duplicated_mesh = bpy.context.view_layer.objects.active
+		duplicated_mesh.name = obj.name + "_retarg"
+		shape_key_name = settings.retarget_shape_key_name if settings.retarget_to_shape_key else None
+		if shape_key_name is None and duplicated_mesh.data.shape_keys is not None:
+			# Re-apply the existing keys as offsets from the retargeted basis so they do not pull back to the old shape.
+			_, key_deltas = shape_keys.read_sparse_shape_keys(duplicated_mesh)
+			update_mesh_vertex_positions_from_array(duplicated_mesh, deformed_positions)
+			shape_keys.write_sparse_shape_keys(duplicated_mesh, mesh_io.get_vertex_coordinates(duplicated_mesh), key_deltas)
+		else:
+			update_mesh_vertex_positions_from_array(duplicated_mesh, deformed_positions, shape_key_name)
+		original_target_location = dest_obj.location
+		relative_position = obj.location - src_obj.location
+		duplicated_mesh.location = dest_obj.location + relative_position
+
+def create_retargeted_armature(src_obj, dest_obj, rbf_type, deform_objects=None):
+	scene = bpy.context.scene
+	settings = scene.ALCHEMESH_settings
+	rbf = create_rbf(src_obj, dest_obj, rbf_type)
+	if deform_objects is None:
+		deform_objects = [item.object for item in scene.deform_objects]
+	objects = [obj for obj in deform_objects if obj is not None and obj.type in {'ARMATURE', 'MESH'}]
+	workers = settings.worker_count or default_worker_count()
+	with create_executor(workers, settings.use_process_pool) as executor:
+		futures = evaluate_deform_objects(rbf, objects, executor, workers)
+		for index, (obj, future) in enumerate(zip(objects, futures)):
+			retarget_deform_object(src_obj, dest_obj, obj, future.result().ravel(), settings)
+			update_progress("Retargeting Objects", (index + 1) / len(objects))
 
 class OBJECT_OT_auto_rig_retarget(bpy.types.Operator):
 	bl_idname = "object.auto_rig_retarget"
@@ -317,6 +335,18 @@ class OBJECT_OT_auto_rig_retarget(bpy.types.Operator):
 		create_retargeted_armature(src_obj, dest_obj, rbf_type)
 		return {'FINISHED'}
 
+class OBJECT_OT_clear_rbf_cache(bpy.types.Operator):
+	bl_idname = "object.clear_rbf_cache"
+	bl_label = "Clear RBF Cache"
+	bl_description = "Delete all cached RBF weights"
+	bl_options = {'REGISTER'}
+
+	def execute(self, context):
+		settings = context.scene.ALCHEMESH_settings
+		get_rbf_cache(settings).clear()
+		self.report({'INFO'}, "RBF cache cleared")
+		return {'FINISHED'}
+
 def _label_multiline(context, text, parent):
 	chars = int(context.region.width / 7)
 	wrapper = textwrap.TextWrapper(width=chars)
@@ -380,12 +410,152 @@ class ALCHEMESH_Settings(bpy.types.PropertyGroup):
 		min=1,
 		description="Sets the level of proxy for control points, higher values is lower lod level, and less accurate. Lower numbers are more accurate, but at a cost of generation time."
 	)
+	control_point_mode: bpy.props.EnumProperty(
+		name="Control Points",
+		description="How control points are picked from the source mesh",
+		items=[
+			('STRIDE', 'Proxy Level', 'Use every Nth vertex, where N is the proxy level'),
+			('FARTHEST', 'Farthest Point', 'Spread a fixed number of control points evenly over the surface with farthest point sampling'),
+			('VOXEL', 'Voxel Grid', 'Keep one vertex per occupied voxel, with the voxel size chosen to meet the control point budget'),
+			('ADAPTIVE', 'Adaptive', 'Start from a coarse set and keep adding the worst-fit source vertices until the maximum error is met')
+		],
+		default='STRIDE'
+	)
+	control_point_count: bpy.props.IntProperty(
+		name="Control Point Count",
+		default=2000,
+		min=4,
+		description="Number of control points to sample. Feature vertices are always kept, even if they exceed this budget. In adaptive mode this is the upper limit."
+	)
+	adaptive_max_error: bpy.props.FloatProperty(
+		name="Max Error",
+		default=0.0005,
+		min=0.0,
+		subtype='DISTANCE',
+		precision=5,
+		description="Adaptive fitting stops once every source vertex lands within this distance of its target position."
+	)
+	adaptive_initial_count: bpy.props.IntProperty(
+		name="Initial Points",
+		default=256,
+		min=4,
+		description="Number of evenly spread control points adaptive fitting starts from."
+	)
+	adaptive_batch_size: bpy.props.IntProperty(
+		name="Points per Step",
+		default=64,
+		min=1,
+		description="Number of worst-fit vertices added to the control set per refinement step."
+	)
+	keep_displacement_features: bpy.props.BoolProperty(
+		name="Keep Displaced Vertices",
+		default=True,
+		description="Always keep the vertices that move furthest between the source and target mesh."
+	)
+	displacement_feature_fraction: bpy.props.FloatProperty(
+		name="Displaced Fraction",
+		default=0.02,
+		min=0.0,
+		max=1.0,
+		subtype='FACTOR',
+		description="Fraction of source vertices, ranked by displacement, that are always kept."
+	)
+	keep_uv_seams: bpy.props.BoolProperty(
+		name="Keep UV Seams",
+		default=False,
+		description="Always keep vertices on edges marked as UV seams."
+	)
+	keep_group_boundaries: bpy.props.BoolProperty(
+		name="Keep Vertex Group Boundaries",
+		default=False,
+		description="Always keep vertices where the dominant vertex group changes."
+	)
+	solver_mode: bpy.props.EnumProperty(
+		name="Solver",
+		description="How the RBF system is solved",
+		items=[
+			('GLOBAL', 'Global', 'Solve one RBF system over all control points'),
+			('PARTITION', 'Partition of Unity', 'Split the control points into overlapping cells, solve each cell independently and blend the results. Memory is bounded by the cell size')
+		],
+		default='GLOBAL'
+	)
+	points_per_cell: bpy.props.IntProperty(
+		name="Points per Cell",
+		default=2000,
+		min=50,
+		description="Target number of control points each partition of unity cell solves, including the overlap with neighbouring cells. No cell solves more than twice this number."
+	)
+	cell_overlap: bpy.props.FloatProperty(
+		name="Cell Overlap",
+		default=1.5,
+		min=1.0,
+		max=4.0,
+		description="Support radius of each cell relative to the radius of its bounding sphere."
+	)
+	worker_count: bpy.props.IntProperty(
+		name="Workers",
+		default=0,
+		min=0,
+		description="Number of parallel workers. 0 uses all but one CPU core."
+	)
+	use_process_pool: bpy.props.BoolProperty(
+		name="Use Processes",
+		default=False,
+		description="Run parallel work in forked worker processes instead of threads. Only available on Linux and macOS; threads are used elsewhere."
+	)
+	rbf_radius: bpy.props.FloatProperty(
+		name="RBF Radius",
+		default=0.5,
+		min=0.0001,
+		description="Scaling radius of the radial basis function."
+	)
+	use_cache: bpy.props.BoolProperty(
+		name="Cache RBF Weights",
+		default=True,
+		description="Store solved RBF weights on disk and reuse them when the same source and target meshes are retargeted again."
+	)
+	cache_dir: bpy.props.StringProperty(
+		name="Cache Directory",
+		default="",
+		subtype='DIR_PATH',
+		description="Directory for cached RBF weights. Leave empty to use a folder next to the .blend file, or the user data folder for unsaved files."
+	)
+	cache_size: bpy.props.IntProperty(
+		name="Cache Size (MB)",
+		default=2048,
+		min=1,
+		description="Maximum total size of the RBF weight cache. The least recently used entries are removed first."
+	)
+	retarget_to_shape_key: bpy.props.BoolProperty(
+		name="Retarget to Shape Key",
+		default=False,
+		description="Write retargeted mesh positions into a shape key instead of replacing the base mesh."
+	)
+	retarget_shape_key_name: bpy.props.StringProperty(
+		name="Shape Key Name",
+		default="AlcheMesh_Retarget",
+		description="Name of the shape key that receives the retargeted positions."
+	)
+	transfer_mode: bpy.props.EnumProperty(
+		name="Transfer Mode",
+		items=[
+			('INDEX', "Vertex Index", "Copy data between vertices with the same index. Both meshes must share topology"),
+			('SURFACE', "Surface Projection", "Project each target vertex onto the nearest source triangle and interpolate barycentrically. Works with any topology"),
+		],
+		default='INDEX'
+	)
+	max_influences: bpy.props.IntProperty(
+		name="Max Influences",
+		default=4,
+		min=0,
+		description="Maximum number of vertex groups per vertex after a surface projection transfer. 0 keeps all influences."
+	)
 
 class ALCHEMESH_OT_install_dependencies(bpy.types.Operator):
 	bl_idname = "example.install_dependencies"
 	bl_label = "Install Python Dependencies"
 	bl_description = (
-		"Downloads and installs the required Setuptools, GitPython, and PyGeM packages for this add-on. "
+		"Downloads and installs the SciPy package required by this add-on. "
 		"Internet connection is required. Blender may have to be started with "
 		"elevated permissions in order to install the package")
 	bl_options = {"REGISTER", "INTERNAL"}
@@ -397,14 +567,12 @@ class ALCHEMESH_OT_install_dependencies(bpy.types.Operator):
 	def execute(self, context):
 		try:
 			install_pip()
-			install_and_import_module(module_name="setuptools")
-			install_and_import_module(module_name="git", package_name="GitPython")
-			clone_and_import_module(module_name="PyGeM", github_url="https://github.com/mathLab/PyGeM")
+			install_and_import_module(module_name="scipy")
 		except (subprocess.CalledProcessError, ImportError) as err:
 			self.report({"ERROR"}, str(err))
 			return {"CANCELLED"}
 		global dependencies_installed
-		dependencies_installed = True
+		dependencies_installed = dependencies_available()
 		
 		return {"FINISHED"}
 
@@ -428,17 +596,13 @@ class ALCHEMESH_preferences(bpy.types.AddonPreferences):
 		box = layout.box()
 		row = box.row()
 		if dependencies_installed:
-			row.label(text="PyGeM is installed.", icon='CHECKMARK')
+			row.label(text="NumPy and SciPy are installed.", icon='CHECKMARK')
 			row.label(text="The addon is ready for use.", icon='INFO')
 		else:
-			row.label(text="PyGeM is not installed.", icon='ERROR')
+			row.label(text="SciPy is not installed.", icon='ERROR')
 			row.label(text="Press the button below to install the required dependencies.", icon='INFO')
 			warning_box = box.box()
-			warning_box.label(text="⚠️ Warning: To install PyGeM, Blender will follow these steps:")
-			warning_box.label(text="1. Install SetupTools.")
-			warning_box.label(text="2. Install GitPython.")
-			warning_box.label(text="3. Clone the custom PyGeM repository.")
-			warning_box.label(text="4. Build and import PyGeM into the Blender environment.")
+			warning_box.label(text="⚠️ Warning: Blender will install SciPy with pip into its Python environment.")
 			install_row = box.row()
 			install_row.operator(ALCHEMESH_OT_install_dependencies.bl_idname, icon="CONSOLE")
 		license_box = layout.box()
@@ -526,23 +690,27 @@ class OBJECT_OT_transfer_weights(bpy.types.Operator):
 		scene = context.scene
 		src_obj = scene.auto_rig_retarget_src
 		dest_obj = scene.auto_rig_retarget_dest
-		for src_vgroup in src_obj.vertex_groups:
-			v_group_name = src_vgroup.name
-			if not v_group_name not in dest_obj.vertex_groups:
-				vg = dest_obj.vertex_groups.get(v_group_name)
-				if vg is not None:
-					dest_obj.vertex_groups.remove(vg)
-			if v_group_name not in dest_obj.vertex_groups:
-				dest_obj.vertex_groups.new(name=v_group_name)
-		num_vertices = len(src_obj.data.vertices)
-		for i, src_vert in enumerate(src_obj.data.vertices):
-			update_progress("Transferring Bone Weights", i / num_vertices)
-			src_weights = {group.group: group.weight for group in src_vert.groups}
-			for group_index, weight in src_weights.items():
-				v_group_name = src_obj.vertex_groups[group_index].name
-				if v_group_name in dest_obj.vertex_groups:
-					v_group_target = dest_obj.vertex_groups[v_group_name]
-					v_group_target.add([src_vert.index], weight, 'REPLACE')
+		group_names = [src_vgroup.name for src_vgroup in src_obj.vertex_groups]
+		for v_group_name in group_names:
+			vg = dest_obj.vertex_groups.get(v_group_name)
+			if vg is not None:
+				dest_obj.vertex_groups.remove(vg)
+			dest_obj.vertex_groups.new(name=v_group_name)
+		settings = scene.ALCHEMESH_settings
+		vertices, groups, weights = mesh_io.get_vertex_group_weights(src_obj)
+		if settings.transfer_mode == 'SURFACE':
+			projection = get_surface_projection(src_obj, dest_obj)
+			vertices, groups, weights = projection.transfer_weights(vertices, groups, weights, len(group_names), settings.max_influences)
+		else:
+			in_range = vertices < len(dest_obj.data.vertices)
+			vertices, groups, weights = vertices[in_range], groups[in_range], weights[in_range]
+		order = np.argsort(groups, kind='stable')
+		vertices, groups, weights = vertices[order], groups[order], weights[order]
+		boundaries = np.searchsorted(groups, np.arange(len(group_names) + 1))
+		for group_index, v_group_name in enumerate(group_names):
+			update_progress("Transferring Bone Weights", (group_index + 1) / len(group_names))
+			start, end = boundaries[group_index], boundaries[group_index + 1]
+			mesh_io.set_vertex_group_weights(dest_obj.vertex_groups[v_group_name], vertices[start:end], weights[start:end])
 		return {'FINISHED'}
 
 class OBJECT_OT_transfer_shapekeys(bpy.types.Operator):
@@ -551,19 +719,50 @@ class OBJECT_OT_transfer_shapekeys(bpy.types.Operator):
 	bl_description = "Transfer Shape Keys from the source mesh to the target mesh."
 	bl_options = {'REGISTER', 'UNDO'}
 
+	only_changed: BoolProperty(
+		name="Only Changed Keys",
+		default=True,
+		description="Skip shape keys whose coordinates already match the target."
+	)
+	use_rbf: BoolProperty(
+		name="Retarget Through RBF",
+		default=False,
+		description="Move each shape key's offsets through the RBF solved between the source and target meshes, and apply them to the target's basis. Needs meshes with the same vertex count. Otherwise the source coordinates are copied as they are."
+	)
+
 	def execute(self, context):
 		scene = context.scene
 		src_obj = scene.auto_rig_retarget_src
 		dest_obj = scene.auto_rig_retarget_dest
-		if src_obj.data.shape_keys:
-			for sk in src_obj.data.shape_keys.key_blocks:
-				if sk.name != "Basis":
-					if sk.name in dest_obj.data.shape_keys.key_blocks:
-						dest_sk = dest_obj.data.shape_keys.key_blocks[sk.name]
-					else:
-						dest_sk = dest_obj.shape_key_add(name=sk.name)
-					for i, coord in enumerate(sk.data):
-						dest_sk.data[i].co = coord.co
+		settings = scene.ALCHEMESH_settings
+		if not src_obj.data.shape_keys:
+			return {'FINISHED'}
+		surface = settings.transfer_mode == 'SURFACE'
+		if not surface and len(src_obj.data.vertices) != len(dest_obj.data.vertices):
+			self.report({'ERROR'}, "Source and target meshes must have the same number of vertices.")
+			return {'CANCELLED'}
+		basis, key_deltas = shape_keys.read_sparse_shape_keys(src_obj)
+		# The RBF is solved between vertices with the same index, which a surface transfer between different topologies does not have.
+		use_rbf = self.use_rbf and len(src_obj.data.vertices) == len(dest_obj.data.vertices)
+		if self.use_rbf and not use_rbf:
+			self.report({'WARNING'}, "Skipping RBF retargeting: source and target meshes have different vertex counts.")
+		if use_rbf:
+			rbf = create_rbf(src_obj, dest_obj, scene.auto_rig_retarget_rbf)
+			key_deltas = shape_keys.retarget_shape_keys(
+				rbf, src_obj, dest_obj, basis, key_deltas,
+				progress=lambda progress: update_progress("Retargeting Shape Keys", progress)
+			)
+		if surface:
+			# Retargeted deltas are already in the target's local space.
+			matrix = None if use_rbf else mesh_io.local_to_local_matrix(src_obj, dest_obj)
+			key_deltas = shape_keys.project_shape_keys(get_surface_projection(src_obj, dest_obj), key_deltas, matrix)
+		if use_rbf or surface:
+			basis = shape_keys.get_basis_coordinates(dest_obj)
+		written = shape_keys.write_sparse_shape_keys(
+			dest_obj, basis, key_deltas, self.only_changed,
+			progress=lambda progress: update_progress("Transferring Shape Keys", progress)
+		)
+		self.report({'INFO'}, f"Transferred {written} of {len(key_deltas)} shape keys.")
 		return {'FINISHED'}
 
 bpy.utils.register_class(SCENE_OT_add_deform_object)
@@ -623,13 +822,55 @@ def draw_deform_ui(self, layout, context):
 	row = box.row(align=True)
 	row.operator("scene.add_deform_object", icon='ADD', text="")
 	row.operator("scene.remove_deform_object", icon='REMOVE', text="")
-	row = layout.row()
-	row.label(text="Proxy Level:")
 	settings = context.scene.ALCHEMESH_settings
-	row.prop(settings, "proxy_level", text="")
+	row = layout.row()
+	row.prop(settings, "control_point_mode")
+	if settings.control_point_mode == 'STRIDE':
+		row = layout.row()
+		row.label(text="Proxy Level:")
+		row.prop(settings, "proxy_level", text="")
+	else:
+		row = layout.row()
+		row.prop(settings, "control_point_count")
+		if settings.control_point_mode == 'ADAPTIVE':
+			row = layout.row()
+			row.prop(settings, "adaptive_max_error")
+			row = layout.row()
+			row.prop(settings, "adaptive_initial_count")
+			row.prop(settings, "adaptive_batch_size")
+		row = layout.row()
+		row.prop(settings, "keep_displacement_features")
+		if settings.keep_displacement_features:
+			row.prop(settings, "displacement_feature_fraction", text="")
+		row = layout.row()
+		row.prop(settings, "keep_uv_seams")
+		row.prop(settings, "keep_group_boundaries")
 	row = layout.row()
 	row.prop(scene, "auto_rig_retarget_rbf", text="RBF:")
 	row = layout.row()
+	row.prop(settings, "rbf_radius", text="Radius")
+	row = layout.row()
+	row.prop(settings, "solver_mode")
+	if settings.solver_mode == 'PARTITION':
+		row = layout.row()
+		row.prop(settings, "points_per_cell")
+		row.prop(settings, "cell_overlap")
+	row = layout.row()
+	row.prop(settings, "worker_count")
+	row.prop(settings, "use_process_pool")
+	row = layout.row()
+	row.prop(settings, "use_cache")
+	if settings.use_cache:
+		row = layout.row()
+		row.prop(settings, "cache_dir", text="")
+		row = layout.row()
+		row.prop(settings, "cache_size")
+		row.operator("object.clear_rbf_cache", icon='TRASH', text="")
+	row = layout.row()
+	row.prop(settings, "retarget_to_shape_key")
+	if settings.retarget_to_shape_key:
+		row.prop(settings, "retarget_shape_key_name", text="")
+	row = layout.row()
 	if not dependencies_installed:
 		row.label(text="Python Depencencies Missing!", icon="ERROR")
 		row = layout.row()
@@ -640,7 +881,11 @@ def draw_deform_ui(self, layout, context):
 
 def draw_data_transfer_ui(self, layout, context):
 	scene = context.scene
+	settings = scene.ALCHEMESH_settings
 	layout.label(text="Transfer from Source Mesh:")
+	layout.prop(settings, "transfer_mode")
+	if settings.transfer_mode == 'SURFACE':
+		layout.prop(settings, "max_influences")
 	row = layout.row()
 	row.operator("object.transfer_weights", text="Vertex Groups")
 	row = layout.row()
@@ -901,7 +1146,8 @@ def register():
 			('multi_quadratic_biharmonic_spline', 'Multi-Quadratic Biharmonic Spline', ''),
 			('inv_multi_quadratic_biharmonic_spline', 'Inv Multi-Quadratic Biharmonic Spline', ''),
 			('thin_plate_spline', 'Thin Plate Spline', ''),
-			('polyharmonic_spline', 'Polyharmonic Spline', '')
+			('polyharmonic_spline', 'Polyharmonic Spline', ''),
+			('wendland_c2_spline', 'Wendland C2 (Sparse)', 'Compactly supported kernel solved as a sparse system. The support is derived from the control point spacing, the radius is not used')
 		],
 		default='polyharmonic_spline'
 	)
@@ -944,6 +1190,7 @@ def register():
 	bpy.utils.register_class(OBJECT_OT_transfer_shapekeys)
 	bpy.utils.register_class(OBJECT_OT_rebind_armature)
 	bpy.utils.register_class(OBJECT_OT_auto_rig_retarget)
+	bpy.utils.register_class(OBJECT_OT_clear_rbf_cache)
 	bpy.utils.register_class(OBJECT_OT_test_dna)
 	bpy.utils.register_class(OBJECT_PT_auto_rig_retarget_panel)
 	bpy.utils.register_class(ALCHEMESH_Settings)
@@ -954,11 +1201,7 @@ def register():
 	bpy.utils.register_class(ALCHEMESH_preferences)
 	bpy.types.Scene.progress_value = bpy.props.FloatProperty(name="Progress", default=0.0, min=0.0, max=1.0)
 	bpy.types.Scene.is_progressing = bpy.props.BoolProperty(name="Is Progressing", default=False)
-	try:
-		imp.find_module('PyGeM')
-		dependencies_installed = True
-	except ImportError:
-		dependencies_installed = False
+	dependencies_installed = dependencies_available()
 	bpy.utils.register_class(CustomTab)
 	bpy.utils.register_class(AddCustomTabOperator)
 	bpy.types.Scene.alchemesh_tabs = bpy.props.CollectionProperty(type=CustomTab)
@@ -966,6 +1209,7 @@ def register():
 	bpy.app.handlers.load_post.append(load_handler)
 
 def unregister():
+	dna_io.invalidate_dna()
 	meta.unload_dll()
 	global custom_icons
 	bpy.utils.previews.remove(custom_icons)
@@ -976,6 +1220,7 @@ def unregister():
 	bpy.utils.unregister_class(OBJECT_OT_test_dna)
 	bpy.utils.unregister_class(OBJECT_OT_rebind_armature)
 	bpy.utils.unregister_class(OBJECT_OT_auto_rig_retarget)
+	bpy.utils.unregister_class(OBJECT_OT_clear_rbf_cache)
 	bpy.utils.unregister_class(OBJECT_PT_auto_rig_retarget_panel)
 	bpy.utils.unregister_class(ALCHEMESH_OT_install_dependencies)
 	bpy.utils.unregister_class(ALCHEMESH_Settings)
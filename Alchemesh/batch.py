@@ -0,0 +1,171 @@
+# Headless batch retargeting.
+#
+# Driver (plain Python or Blender):
+#   python Alchemesh/batch.py manifest.jsonl --blender /path/to/blender --workers 8 --output-dir out
+#   blender -b -P Alchemesh/batch.py -- manifest.jsonl --workers 8 --output-dir out
+#
+# The manifest has one JSON object per line (blank lines and lines starting with # are skipped):
+#   {"blend": "chars/base.blend", "source": "BaseHead", "target": "Char01_Head",
+#    "deform": ["Armature", "Shirt"], "output": "char01.fbx",
+#    "rbf": "polyharmonic_spline", "settings": {"control_point_mode": "FARTHEST"}}
+# "armature" may be given as a single name in addition to "deform". Relative paths resolve against
+# the manifest's folder (inputs) or --output-dir (outputs). Outputs ending in .fbx are exported,
+# anything else is saved as a .blend copy; the default is <target>.blend.
+
+import os
+import sys
+import json
+import argparse
+import shutil
+import tempfile
+import subprocess
+import importlib
+
+try:
+	import bpy
+except ImportError:
+	bpy = None
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def read_manifest(path):
+	base_dir = os.path.dirname(os.path.abspath(path))
+	jobs = []
+	with open(path, 'r') as file:
+		for line_number, line in enumerate(file, 1):
+			line = line.strip()
+			if not line or line.startswith("#"):
+				continue
+			try:
+				job = json.loads(line)
+			except json.JSONDecodeError as e:
+				raise ValueError(f"{path}:{line_number}: invalid manifest line: {e}") from e
+			for field in ("blend", "source", "target"):
+				if field not in job:
+					raise ValueError(f"{path}:{line_number}: missing '{field}'")
+			job["blend"] = os.path.normpath(os.path.join(base_dir, job["blend"]))
+			job["line"] = line_number
+			jobs.append(job)
+	return jobs
+
+def shard_jobs(jobs, count):
+	shards = [[] for _ in range(max(1, min(count, len(jobs))))]
+	for index, job in enumerate(jobs):
+		shards[index % len(shards)].append(job)
+	return shards
+
+def script_args(argv):
+	return argv[argv.index("--") + 1:] if "--" in argv else argv[1:]
+
+def parse_args(argv):
+	parser = argparse.ArgumentParser(description="Retarget many characters with AlcheMesh in background Blender processes.")
+	parser.add_argument("manifest", nargs="?", help="JSON-lines manifest, one character per line")
+	parser.add_argument("--blender", default=None, help="Blender executable (defaults to the running Blender or 'blender' on PATH)")
+	parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Number of background Blender processes")
+	parser.add_argument("--output-dir", default=os.getcwd(), help="Folder for results and worker logs")
+	parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+	return parser.parse_args(script_args(argv))
+
+def run_driver(args):
+	if not args.manifest:
+		raise SystemExit("A manifest is required")
+	jobs = read_manifest(args.manifest)
+	if not jobs:
+		print("Manifest is empty")
+		return 0
+	blender = args.blender or (bpy.app.binary_path if bpy is not None else "blender")
+	output_dir = os.path.abspath(args.output_dir)
+	os.makedirs(output_dir, exist_ok=True)
+	shard_dir = tempfile.mkdtemp(prefix="alchemesh_batch_")
+	processes = []
+	shards = shard_jobs(jobs, args.workers)
+	# Each Blender also runs its own evaluation pool; split the cores between them unless a job sets it.
+	worker_count = max(1, (os.cpu_count() or 1) // len(shards))
+	for index, shard in enumerate(shards):
+		for job in shard:
+			job.setdefault("settings", {}).setdefault("worker_count", worker_count)
+		shard_path = os.path.join(shard_dir, f"shard_{index}.json")
+		with open(shard_path, 'w') as file:
+			json.dump(shard, file)
+		log_path = os.path.join(output_dir, f"batch_worker_{index}.log")
+		command = [blender, "-b", "--factory-startup", "-P", os.path.abspath(__file__), "--", "--worker", shard_path, "--output-dir", output_dir]
+		log = open(log_path, 'w')
+		processes.append((index, subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), log, log_path, len(shard)))
+		print(f"Worker {index}: {len(shard)} job(s), log {log_path}")
+	failed_workers = 0
+	for index, process, log, log_path, job_count in processes:
+		return_code = process.wait()
+		log.close()
+		if return_code != 0:
+			failed_workers += 1
+			print(f"Worker {index} failed (exit code {return_code}), see {log_path}")
+		else:
+			print(f"Worker {index} finished {job_count} job(s)")
+	shutil.rmtree(shard_dir, ignore_errors=True)
+	return 1 if failed_workers else 0
+
+def load_addon():
+	parent_dir = os.path.dirname(PACKAGE_DIR)
+	if parent_dir not in sys.path:
+		sys.path.insert(0, parent_dir)
+	addon = importlib.import_module(os.path.basename(PACKAGE_DIR))
+	if not hasattr(bpy.types.Scene, "ALCHEMESH_settings"):
+		addon.register()
+	return addon
+
+def get_object(name):
+	obj = bpy.data.objects.get(name)
+	if obj is None:
+		raise KeyError(f"Object '{name}' not found")
+	return obj
+
+def output_path(job, output_dir):
+	path = job.get("output") or f"{job['target']}.blend"
+	return os.path.normpath(os.path.join(output_dir, path))
+
+def run_job(addon, job, output_dir):
+	bpy.ops.wm.open_mainfile(filepath=job["blend"])
+	scene = bpy.context.scene
+	settings = scene.ALCHEMESH_settings
+	for name, value in job.get("settings", {}).items():
+		setattr(settings, name, value)
+	src_obj = get_object(job["source"])
+	dest_obj = get_object(job["target"])
+	names = list(job.get("deform", []))
+	if job.get("armature"):
+		names.insert(0, job["armature"])
+	deform_objects = [get_object(name) for name in names]
+	addon.create_retargeted_armature(src_obj, dest_obj, job.get("rbf", "polyharmonic_spline"), deform_objects)
+	path = output_path(job, output_dir)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	if path.lower().endswith(".fbx"):
+		bpy.ops.export_scene.fbx(filepath=path, add_leaf_bones=False)
+	else:
+		bpy.ops.wm.save_as_mainfile(filepath=path, copy=True)
+	return path
+
+def run_worker(args):
+	addon = load_addon()
+	with open(args.worker, 'r') as file:
+		jobs = json.load(file)
+	failures = 0
+	for job in jobs:
+		try:
+			path = run_job(addon, job, os.path.abspath(args.output_dir))
+			print(f"OK line {job['line']}: {job['target']} -> {path}")
+		except Exception as e:
+			failures += 1
+			print(f"FAILED line {job['line']}: {job['target']}: {e}")
+		sys.stdout.flush()
+	return 1 if failures else 0
+
+def main(argv=None):
+	args = parse_args(sys.argv if argv is None else argv)
+	if args.worker:
+		if bpy is None:
+			raise SystemExit("Worker mode must run inside Blender")
+		return run_worker(args)
+	return run_driver(args)
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,328 @@
+import os
+import sys
+import tempfile
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+dnacalib_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dnacalib')
+if dnacalib_dir not in sys.path:
+	sys.path.append(dnacalib_dir)
+
+try:
+	import dna
+	import dnacalib as dnac
+except ImportError as e:
+	print(f"Failed to import from dna: {e}")
+	dna = None
+	dnac = None
+
+DEFAULT_CACHE_SIZE = 2 * 1024 ** 3
+
+# What each data layer decodes. A reader opened with one layer can serve every layer it is a superset of.
+if dna is not None:
+	LAYER_CONTENTS = {
+		dna.DataLayer_Descriptor: {"descriptor"},
+		dna.DataLayer_Definition: {"descriptor", "definition"},
+		dna.DataLayer_Behavior: {"descriptor", "definition", "behavior"},
+		dna.DataLayer_GeometryWithoutBlendShapes: {"descriptor", "definition", "geometry"},
+		dna.DataLayer_Geometry: {"descriptor", "definition", "geometry", "blend_shapes"},
+		dna.DataLayer_AllWithoutBlendShapes: {"descriptor", "definition", "behavior", "geometry"},
+		dna.DataLayer_All: {"descriptor", "definition", "behavior", "geometry", "blend_shapes"},
+	}
+else:
+	LAYER_CONTENTS = {}
+
+def layer_covers(available, requested):
+	return LAYER_CONTENTS[requested] <= LAYER_CONTENTS[available]
+
+def covering_layer(contents):
+	return min((layer for layer in LAYER_CONTENTS if contents <= LAYER_CONTENTS[layer]), key=lambda layer: len(LAYER_CONTENTS[layer]))
+
+def _check_status(action):
+	if not dna.Status.isOk():
+		raise RuntimeError(f"Error {action} DNA: {dna.Status.get().message}")
+
+def read_dna_stream(stream, layer=None):
+	reader = dna.BinaryStreamReader(stream, dna.DataLayer_All if layer is None else layer)
+	reader.read()
+	_check_status("loading")
+	return reader
+
+def read_dna(path, layer=None, use_memory_map=True):
+	# Memory mapping lets the OS page the file in instead of copying it through a read buffer, which
+	# matters most on network shares. Some file systems refuse the mapping, so fall back to a FileStream.
+	if use_memory_map:
+		stream = dna.MemoryMappedFileStream(path, dna.MemoryMappedFileStream.AccessMode_Read)
+		reader = dna.BinaryStreamReader(stream, dna.DataLayer_All if layer is None else layer)
+		reader.read()
+		if dna.Status.isOk():
+			return reader, stream
+		print(f"Memory mapping {path} failed ({dna.Status.get().message}), reading it buffered")
+	stream = dna.FileStream(path, dna.FileStream.AccessMode_Read, dna.FileStream.OpenMode_Binary)
+	return read_dna_stream(stream, layer), stream
+
+def read_dna_bytes(data, layer=None):
+	# For DNA that is already in memory, e.g. taken from an archive or a cache.
+	data = bytes(data)
+	stream = dna.MemoryStream(len(data))
+	try:
+		stream.write(data, len(data))
+	except TypeError:
+		# Builds whose SWIG wrapper maps char* to str cannot take binary data; go through a temporary file.
+		return _read_dna_via_file(data, layer)
+	return read_dna_stream(stream, layer), stream
+
+def _read_dna_via_file(data, layer):
+	handle, path = tempfile.mkstemp(suffix=".dna")
+	try:
+		with os.fdopen(handle, "wb") as file:
+			file.write(data)
+		stream = dna.FileStream(path, dna.FileStream.AccessMode_Read, dna.FileStream.OpenMode_Binary)
+		return read_dna_stream(stream, layer), stream
+	finally:
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+class DNAReaderCache:
+	# Parsed readers keyed by file identity and data layer. The decoded size is not exposed by the DNA
+	# API, so each entry is charged the size of its file; the least recently used entries go first.
+	def __init__(self, max_size=DEFAULT_CACHE_SIZE, use_memory_map=True):
+		self.max_size = max_size
+		self.use_memory_map = use_memory_map
+		self._entries = OrderedDict()
+		self._lock = threading.RLock()
+
+	@staticmethod
+	def _file_key(path):
+		path = os.path.abspath(path)
+		stat = os.stat(path)
+		return (os.path.normcase(path), stat.st_mtime_ns, stat.st_size), stat.st_size
+
+	def get(self, path, layer=None):
+		layer = dna.DataLayer_All if layer is None else layer
+		file_key, size = self._file_key(path)
+		with self._lock:
+			for key, entry in self._entries.items():
+				if key[0] == file_key and layer_covers(key[1], layer):
+					self._entries.move_to_end(key)
+					return entry[0]
+			# Upgrade: open the narrowest layer that also covers what is already cached for this file,
+			# so the richer reader replaces the narrower ones instead of sitting next to them.
+			cached_layers = [key[1] for key in self._entries if key[0] == file_key]
+			layer = covering_layer(set().union(LAYER_CONTENTS[layer], *(LAYER_CONTENTS[cached] for cached in cached_layers)))
+			for cached in cached_layers:
+				del self._entries[(file_key, cached)]
+			# The stream is kept next to the reader so it outlives it.
+			reader, stream = read_dna(path, layer, self.use_memory_map)
+			key = (file_key, layer)
+			self._entries[key] = (reader, stream, size)
+			self._evict(keep=key)
+			return reader
+
+	def _evict(self, keep=None):
+		total_size = sum(entry[2] for entry in self._entries.values())
+		for key in list(self._entries):
+			if total_size <= self.max_size:
+				break
+			if key == keep:
+				continue
+			total_size -= self._entries.pop(key)[2]
+
+	def invalidate(self, path):
+		path = os.path.normcase(os.path.abspath(path))
+		with self._lock:
+			for key in [key for key in self._entries if key[0][0] == path]:
+				del self._entries[key]
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+reader_cache = DNAReaderCache()
+
+def load_dna(path, layer=None):
+	# Readers are shared between callers and must be treated as read-only; use load_calibrated_dna to modify one.
+	# Pass the narrowest layer the caller needs, a cached reader with a richer layer is reused when available.
+	return reader_cache.get(path, layer)
+
+def load_dna_bytes(data, layer=None):
+	# Not cached: the caller already owns the bytes and decides how long to keep them.
+	return read_dna_bytes(data, layer)[0]
+
+def load_calibrated_dna(path, layer=None):
+	return dnac.DNACalibDNAReader(load_dna(path, layer))
+
+def invalidate_dna(path=None):
+	if path is None:
+		reader_cache.clear()
+	else:
+		reader_cache.invalidate(path)
+
+def _array(values, dtype):
+	return np.fromiter(values, dtype=dtype, count=len(values))
+
+def _columns(dtype, *columns):
+	array = np.empty((len(columns[0]), len(columns)), dtype=dtype)
+	for i, column in enumerate(columns):
+		array[:, i] = _array(column, dtype)
+	return array
+
+class DNAArrays:
+	# Contiguous NumPy arrays over the reader's array getters. SWIG returns every array as a tuple of Python
+	# numbers, so each getter is converted once per argument and kept; the arrays are shared between callers
+	# of the same reader and therefore read-only.
+	def __init__(self, reader, memo=None):
+		self.reader = reader
+		self._memo = {} if memo is None else memo
+
+	def _memoize(self, key, build):
+		# Converted outside the lock so unrelated readers and meshes convert concurrently; if two threads
+		# race on the same entry the first one stored wins.
+		with _arrays_lock:
+			value = self._memo.get(key)
+		if value is not None:
+			return value
+		value = build()
+		for array in value if isinstance(value, tuple) else (value,):
+			array.flags.writeable = False
+		with _arrays_lock:
+			return self._memo.setdefault(key, value)
+
+	def vertex_positions(self, mesh_index):
+		reader = self.reader
+		return self._memoize(("vertex_positions", mesh_index), lambda: _columns(
+			np.float32,
+			reader.getVertexPositionXs(mesh_index),
+			reader.getVertexPositionYs(mesh_index),
+			reader.getVertexPositionZs(mesh_index)
+		))
+
+	def vertex_normals(self, mesh_index):
+		reader = self.reader
+		return self._memoize(("vertex_normals", mesh_index), lambda: _columns(
+			np.float32,
+			reader.getVertexNormalXs(mesh_index),
+			reader.getVertexNormalYs(mesh_index),
+			reader.getVertexNormalZs(mesh_index)
+		))
+
+	def vertex_uvs(self, mesh_index):
+		reader = self.reader
+		return self._memoize(("vertex_uvs", mesh_index), lambda: _columns(
+			np.float32,
+			reader.getVertexTextureCoordinateUs(mesh_index),
+			reader.getVertexTextureCoordinateVs(mesh_index)
+		))
+
+	def layout_positions(self, mesh_index):
+		return self._memoize(("layout_positions", mesh_index), lambda: _array(self.reader.getVertexLayoutPositionIndices(mesh_index), np.int32))
+
+	def layout_normals(self, mesh_index):
+		return self._memoize(("layout_normals", mesh_index), lambda: _array(self.reader.getVertexLayoutNormalIndices(mesh_index), np.int32))
+
+	def layout_uvs(self, mesh_index):
+		return self._memoize(("layout_uvs", mesh_index), lambda: _array(self.reader.getVertexLayoutTextureCoordinateIndices(mesh_index), np.int32))
+
+	def faces(self, mesh_index):
+		# Faces flattened the way Mesh.loops and Mesh.polygons take them: (loop_vertices, loop_starts, loop_totals).
+		def build():
+			reader = self.reader
+			face_count = reader.getFaceCount(mesh_index)
+			faces = [reader.getFaceVertexLayoutIndices(mesh_index, face_index) for face_index in range(face_count)]
+			loop_totals = np.fromiter(map(len, faces), dtype=np.int32, count=face_count)
+			loop_vertices = np.fromiter(itertools.chain.from_iterable(faces), dtype=np.int32, count=int(loop_totals.sum()))
+			loop_starts = np.zeros(face_count, dtype=np.int32)
+			np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+			return loop_vertices, loop_starts, loop_totals
+		return self._memoize(("faces", mesh_index), build)
+
+	def joint_translations(self):
+		reader = self.reader
+		return self._memoize(("joint_translations",), lambda: _columns(
+			np.float32,
+			reader.getNeutralJointTranslationXs(),
+			reader.getNeutralJointTranslationYs(),
+			reader.getNeutralJointTranslationZs()
+		))
+
+	def joint_rotations(self):
+		reader = self.reader
+		return self._memoize(("joint_rotations",), lambda: _columns(
+			np.float32,
+			reader.getNeutralJointRotationXs(),
+			reader.getNeutralJointRotationYs(),
+			reader.getNeutralJointRotationZs()
+		))
+
+	def joint_parents(self):
+		reader = self.reader
+		return self._memoize(("joint_parents",), lambda: np.fromiter(
+			map(reader.getJointParentIndex, range(reader.getJointCount())), dtype=np.int32, count=reader.getJointCount()
+		))
+
+	def skin_weights(self, mesh_index):
+		# Non-zero influences as (vertices, joints, weights), indexed by vertex position rather than layout.
+		def build():
+			reader = self.reader
+			joints = []
+			weights = []
+			for vertex_index in range(reader.getVertexPositionCount(mesh_index)):
+				joints.append(reader.getSkinWeightsJointIndices(mesh_index, vertex_index))
+				weights.append(reader.getSkinWeightsValues(mesh_index, vertex_index))
+			counts = np.fromiter(map(len, joints), dtype=np.int64, count=len(joints))
+			total = int(counts.sum())
+			return (
+				np.repeat(np.arange(len(counts), dtype=np.int32), counts),
+				np.fromiter(itertools.chain.from_iterable(joints), dtype=np.int32, count=total),
+				np.fromiter(itertools.chain.from_iterable(weights), dtype=np.float32, count=total)
+			)
+		return self._memoize(("skin_weights", mesh_index), build)
+
+	def blend_shape_channels(self, mesh_index):
+		reader = self.reader
+		return self._memoize(("blend_shape_channels", mesh_index), lambda: np.fromiter(
+			(reader.getBlendShapeChannelIndex(mesh_index, target_index) for target_index in range(reader.getBlendShapeTargetCount(mesh_index))),
+			dtype=np.int32, count=reader.getBlendShapeTargetCount(mesh_index)
+		))
+
+	def blend_shape_target(self, mesh_index, target_index):
+		# (vertex position indices, (K, 3) deltas) of one blend shape target.
+		reader = self.reader
+		return self._memoize(("blend_shape_target", mesh_index, target_index), lambda: (
+			_array(reader.getBlendShapeTargetVertexIndices(mesh_index, target_index), np.int32),
+			_columns(
+				np.float32,
+				reader.getBlendShapeTargetDeltaXs(mesh_index, target_index),
+				reader.getBlendShapeTargetDeltaYs(mesh_index, target_index),
+				reader.getBlendShapeTargetDeltaZs(mesh_index, target_index)
+			)
+		))
+
+# Memoized arrays live exactly as long as their reader; for cached readers that is until eviction or invalidation.
+_reader_arrays = weakref.WeakKeyDictionary()
+_arrays_lock = threading.Lock()
+
+def dna_arrays(reader):
+	# Only for readers that are not modified afterwards. Calibrated readers that run commands should get
+	# their own DNAArrays(reader), which memoizes for its own lifetime only.
+	with _arrays_lock:
+		try:
+			memo = _reader_arrays.get(reader)
+			if memo is None:
+				memo = _reader_arrays[reader] = {}
+		except TypeError:
+			memo = None
+	return DNAArrays(reader, memo)
+
+def save_dna(reader, path):
+	stream = dna.FileStream(path, dna.FileStream.AccessMode_Write, dna.FileStream.OpenMode_Binary)
+	writer = dna.JSONStreamWriter(stream)
+	writer.setFrom(reader)
+	writer.write()
+	_check_status("saving")
+	invalidate_dna(path)
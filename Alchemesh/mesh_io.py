@@ -0,0 +1,130 @@
+import numpy as np
+
+def get_vertex_coordinates(obj):
+	vertices = obj.data.vertices
+	coords = np.empty(len(vertices) * 3, dtype=np.float32)
+	vertices.foreach_get("co", coords)
+	return coords.reshape(-1, 3).astype(np.float64)
+
+def get_edge_vertex_indices(obj):
+	edges = obj.data.edges
+	indices = np.empty(len(edges) * 2, dtype=np.int32)
+	edges.foreach_get("vertices", indices)
+	return indices.reshape(-1, 2)
+
+def get_seam_vertex_indices(obj):
+	edges = obj.data.edges
+	seams = np.empty(len(edges), dtype=bool)
+	edges.foreach_get("use_seam", seams)
+	return np.unique(get_edge_vertex_indices(obj)[seams])
+
+def get_dominant_vertex_groups(obj):
+	dominant = np.full(len(obj.data.vertices), -1, dtype=np.int64)
+	for vertex in obj.data.vertices:
+		if len(vertex.groups):
+			dominant[vertex.index] = max(vertex.groups, key=lambda group: group.weight).group
+	return dominant
+
+def get_vertex_group_boundary_indices(obj):
+	dominant = get_dominant_vertex_groups(obj)
+	edges = get_edge_vertex_indices(obj)
+	boundary = dominant[edges[:, 0]] != dominant[edges[:, 1]]
+	return np.unique(edges[boundary])
+
+def get_vertex_group_weights(obj):
+	# Sparse (vertex, group, weight) triplets gathered in one pass; there is no bulk RNA getter for them.
+	triplets = [(vertex.index, element.group, element.weight) for vertex in obj.data.vertices for element in vertex.groups]
+	if not triplets:
+		return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+	vertices, groups, weights = zip(*triplets)
+	return np.array(vertices, dtype=np.int64), np.array(groups, dtype=np.int64), np.array(weights, dtype=np.float32)
+
+def set_vertex_group_weights(vertex_group, vertex_indices, weights):
+	# VertexGroup.add takes one weight per call, so batch every vertex that shares a weight value.
+	if len(vertex_indices) == 0:
+		return
+	order = np.argsort(weights, kind='stable')
+	sorted_weights = weights[order]
+	sorted_indices = vertex_indices[order]
+	starts = np.flatnonzero(np.r_[True, sorted_weights[1:] != sorted_weights[:-1]])
+	for start, end in zip(starts, np.r_[starts[1:], len(order)]):
+		vertex_group.add(sorted_indices[start:end].tolist(), float(sorted_weights[start]), 'REPLACE')
+
+def to_world(obj, coords):
+	matrix = np.array(obj.matrix_world, dtype=np.float64)
+	return coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+def get_world_vertex_coordinates(obj):
+	return to_world(obj, get_vertex_coordinates(obj))
+
+def from_world(obj, coords):
+	matrix = np.linalg.inv(np.array(obj.matrix_world, dtype=np.float64))
+	return coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+def local_to_local_matrix(src_obj, dest_obj):
+	# Linear part of the mapping from the source's local space to the destination's, for offsets rather than points.
+	matrix = np.linalg.inv(np.array(dest_obj.matrix_world, dtype=np.float64)) @ np.array(src_obj.matrix_world, dtype=np.float64)
+	return matrix[:3, :3]
+
+def get_or_add_shape_key(obj, shape_key_name):
+	if obj.data.shape_keys is None:
+		obj.shape_key_add(name="Basis", from_mix=False)
+	key_block = obj.data.shape_keys.key_blocks.get(shape_key_name)
+	if key_block is None:
+		key_block = obj.shape_key_add(name=shape_key_name, from_mix=False)
+	return key_block
+
+def get_shape_key_coordinates(key_block, out=None):
+	if out is None:
+		out = np.empty(len(key_block.data) * 3, dtype=np.float32)
+	key_block.data.foreach_get("co", out)
+	return out
+
+def set_shape_key_coordinates(key_block, coords):
+	key_block.data.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+
+def set_vertex_coordinates(obj, coords, shape_key_name=None):
+	mesh = obj.data
+	coords = np.ascontiguousarray(coords, dtype=np.float32).ravel()
+	if len(coords) != 3 * len(mesh.vertices):
+		raise ValueError("Mismatch in the number of vertices.")
+	if shape_key_name:
+		get_or_add_shape_key(obj, shape_key_name).data.foreach_set("co", coords)
+	else:
+		mesh.vertices.foreach_set("co", coords)
+		# With shape keys present the reference key drives the evaluated mesh, so keep it in sync.
+		if mesh.shape_keys is not None:
+			mesh.shape_keys.reference_key.data.foreach_set("co", coords)
+	mesh.update()
+
+def set_world_vertex_coordinates(obj, coords, shape_key_name=None):
+	set_vertex_coordinates(obj, from_world(obj, coords), shape_key_name)
+
+def interleave_heads_tails(heads, tails):
+	coords = np.empty((2 * len(heads), 3), dtype=np.float64)
+	coords[0::2] = heads.reshape(-1, 3)
+	coords[1::2] = tails.reshape(-1, 3)
+	return coords
+
+def get_bone_coordinates(armature_obj):
+	bones = armature_obj.data.bones
+	heads = np.empty(len(bones) * 3, dtype=np.float32)
+	tails = np.empty(len(bones) * 3, dtype=np.float32)
+	bones.foreach_get("head_local", heads)
+	bones.foreach_get("tail_local", tails)
+	return interleave_heads_tails(heads, tails)
+
+def get_world_bone_coordinates(armature_obj):
+	return to_world(armature_obj, get_bone_coordinates(armature_obj))
+
+def set_edit_bone_coordinates(armature_obj, coords):
+	# Requires the armature to be in Edit Mode; rows alternate head, tail per bone.
+	edit_bones = armature_obj.data.edit_bones
+	coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+	if len(coords) != 2 * len(edit_bones):
+		raise ValueError("Mismatch in the number of bones.")
+	edit_bones.foreach_set("head", np.ascontiguousarray(coords[0::2]).ravel())
+	edit_bones.foreach_set("tail", np.ascontiguousarray(coords[1::2]).ravel())
+
+def set_world_edit_bone_coordinates(armature_obj, coords):
+	set_edit_bone_coordinates(armature_obj, from_world(armature_obj, coords))
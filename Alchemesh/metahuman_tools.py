@@ -24,11 +24,12 @@ dll_path = os.path.join(dnacalib_dir, "dnacalib.dll")
 sys.path.append(dnacalib_dir)
 
 try:
-	from dna import DataLayer_All, FileStream, Status, BinaryStreamReader, JSONStreamWriter
 	import dna
 	import dnacalib as dnac
 except ImportError as e:
 	print(f"Failed to import from dna: {e}")
+
+from .dna_io import load_dna, load_calibrated_dna, save_dna, dna_arrays
 	
 # Load the DLL
 try:
@@ -53,33 +54,13 @@ def unload_dll():
 		dna_dll = None
 		print("DLL unloaded successfully.")
 
-def load_dna(path):
-	stream = FileStream(path, FileStream.AccessMode_Read, FileStream.OpenMode_Binary)
-	reader = BinaryStreamReader(stream, DataLayer_All)
-	reader.read()
-	if not Status.isOk():
-		status = Status.get()
-		raise RuntimeError(f"Error loading DNA: {status.message}")
-	return reader
-
-
-def save_dna(reader, path):
-	stream = FileStream(path, FileStream.AccessMode_Write, FileStream.OpenMode_Binary)
-	writer = JSONStreamWriter(stream)
-	writer.setFrom(reader)
-	writer.write()
-
-	if not Status.isOk():
-		status = Status.get()
-		raise RuntimeError(f"Error saving DNA: {status.message}")
-		
 def create_json_dna(input_path, output_path):
 	dna_reader = load_dna(input_path)
 	save_dna(dna_reader, output_path)
 
 def rebind_armature(source_dna,output_dna,morphed_armature):
 	# Load the DNA data
-	dna_data = load_dna(source_dna)  # This function needs to be defined to load the DNA
+	dna_data = load_calibrated_dna(source_dna)
 
 	joint_count = dna_data.getJointCount()
 
@@ -121,8 +102,12 @@ def rebind_armature(source_dna,output_dna,morphed_armature):
 	# save_dna(output_dna, dna_data)  # This function needs to be defined to save the DNA
 	
 def create_armatures_from_dna(source_dna):
-	# Load the DNA data
-	dna_data = load_dna(source_dna)  # Function to load DNA data
+	# Joint names, hierarchy and neutral transforms all live in the definition layer
+	dna_data = load_dna(source_dna, dna.DataLayer_Definition)
+	arrays = dna_arrays(dna_data)
+	translations = arrays.joint_translations()
+	rotations = arrays.joint_rotations()
+	parents = arrays.joint_parents()
 	lod_count = dna_data.getLODCount()
 	
 	# Load all LODs
@@ -152,19 +137,9 @@ def create_armatures_from_dna(source_dna):
 
 		# Create bones
 		bones = {}
-		for i in range(joint_count):
-			joint_name = joint_names[i]
-			joint_index = joint_indices[i]
-			joint_translation = (
-				dna_data.getNeutralJointTranslationXs()[joint_index],
-				dna_data.getNeutralJointTranslationYs()[joint_index],
-				dna_data.getNeutralJointTranslationZs()[joint_index]
-			)
-			joint_rotation = (
-				dna_data.getNeutralJointRotationXs()[joint_index],
-				dna_data.getNeutralJointRotationYs()[joint_index],
-				dna_data.getNeutralJointRotationZs()[joint_index]
-			)
+		for joint_name, joint_index in zip(joint_names, joint_indices):
+			joint_translation = translations[joint_index]
+			joint_rotation = rotations[joint_index]
 
 			# Add bone
 			bone = armature.edit_bones.new(joint_name)
@@ -181,13 +156,11 @@ def create_armatures_from_dna(source_dna):
 			bones[joint_name] = bone
 
 		# Set parent-child relationships
-		for i in range(joint_count):
-			joint_name = joint_names[i]
-			parent_index = dna_data.getJointParentIndex(joint_indices[i])
-			if parent_index in joint_indices:
-				parent_name = joint_names[joint_indices.index(parent_index)]
-				if parent_name in bones:
-					bones[joint_name].parent = bones[parent_name]
+		lod_joint_names = dict(zip(joint_indices, joint_names))
+		for joint_name, joint_index in zip(joint_names, joint_indices):
+			parent_name = lod_joint_names.get(int(parents[joint_index]))
+			if parent_name in bones:
+				bones[joint_name].parent = bones[parent_name]
 
 		bpy.ops.object.mode_set(mode='OBJECT')
 		lods.append(armature_obj)
@@ -195,9 +168,30 @@ def create_armatures_from_dna(source_dna):
 
 	return lods
 	
+def build_dna_mesh(dna_data, mesh_index, mesh_name):
+	# One Blender vertex per vertex layout entry, as the layout is what the faces index into.
+	arrays = dna_arrays(dna_data)
+	coords = arrays.vertex_positions(mesh_index)[arrays.layout_positions(mesh_index)]
+	loop_vertices, loop_starts, loop_totals = arrays.faces(mesh_index)
+	face_count = len(loop_totals)
+
+	mesh = bpy.data.meshes.new(name=mesh_name)
+	mesh.vertices.add(len(coords))
+	mesh.vertices.foreach_set("co", coords.ravel())
+	mesh.loops.add(len(loop_vertices))
+	mesh.loops.foreach_set("vertex_index", loop_vertices)
+	mesh.polygons.add(face_count)
+	mesh.polygons.foreach_set("loop_start", loop_starts)
+	# Blender 4.0+ derives loop_total from the loop starts and exposes it read-only.
+	if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+		mesh.polygons.foreach_set("loop_total", loop_totals)
+	mesh.update(calc_edges=True)
+	mesh.validate(clean_customdata=False)
+	return mesh
+
 def create_metahuman_meshes(source_dna):
 	# Load the DNA data
-	dna_data = load_dna(source_dna)  # Ensure this function is defined elsewhere
+	dna_data = load_dna(source_dna, dna.DataLayer_GeometryWithoutBlendShapes)
 
 	# Initialize mapping and LOD count
 	mesh_lod_map = {}
@@ -215,38 +209,15 @@ def create_metahuman_meshes(source_dna):
 		mesh_name = dna_data.getMeshName(mesh_index)
 		print(f"Processing Mesh: {mesh_name} at LOD {lod_index}...")
 
-		# Gather vertex data
-		vertex_count = dna_data.getVertexPositionCount(mesh_index)
-		vertex_positions_x = dna_data.getVertexPositionXs(mesh_index)
-		vertex_positions_y = dna_data.getVertexPositionYs(mesh_index)
-		vertex_positions_z = dna_data.getVertexPositionZs(mesh_index)
-
-		# Gather faces
-		face_count = dna_data.getFaceCount(mesh_index)
-		faces = []
-		verts = []
-
-		for vertex_index in dna_data.getVertexLayoutPositionIndices(mesh_index):
-			vert = Vector((vertex_positions_x[vertex_index], vertex_positions_y[vertex_index], vertex_positions_z[vertex_index]))
-			verts.append(vert)
-
-		for face_index in range(face_count):
-			update_progress("Creating faces", face_index / face_count)
-			face = dna_data.getFaceVertexLayoutIndices(mesh_index, face_index)
-			faces.append(face)
-
 		# Check if an object with the same name already exists
 		if mesh_name in bpy.data.objects:
 			print(f"Object {mesh_name} already exists. Skipping...")
 			continue
 
 		# Create a new mesh and object
-		mesh = bpy.data.meshes.new(name=mesh_name)
+		mesh = build_dna_mesh(dna_data, mesh_index, mesh_name)
 		obj = bpy.data.objects.new(mesh_name, mesh)
-
-		# Create mesh from vertices and faces
-		mesh.from_pydata(verts, [], faces)
-		mesh.update()
+		update_progress("Creating meshes", (mesh_index + 1) / dna_data.getMeshCount())
 
 		# Create or get the collection for this LOD
 		collection_name = f"MH_Lod_{lod_index}"
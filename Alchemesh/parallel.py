@@ -0,0 +1,15 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+def default_worker_count():
+	return max(1, (os.cpu_count() or 1) - 1)
+
+def create_executor(workers=0, use_processes=False):
+	# Process pools fork the running interpreter so workers inherit the already imported add-on modules
+	# (Blender's embedded Python cannot re-import them in a spawned child). Where fork is unavailable the
+	# work falls back to threads, which still scale because NumPy releases the GIL inside LAPACK/BLAS.
+	workers = workers or default_worker_count()
+	if use_processes and "fork" in multiprocessing.get_all_start_methods():
+		return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+	return ThreadPoolExecutor(max_workers=workers)
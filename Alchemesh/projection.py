@@ -0,0 +1,125 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from mathutils.bvhtree import BVHTree
+from . import mesh_io
+
+def get_loop_triangles(obj):
+	mesh = obj.data
+	mesh.calc_loop_triangles()
+	triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+	mesh.loop_triangles.foreach_get("vertices", triangles)
+	return triangles.reshape(-1, 3)
+
+def barycentric_coordinates(points, a, b, c):
+	v0 = b - a
+	v1 = c - a
+	v2 = points - a
+	d00 = np.einsum('ij,ij->i', v0, v0)
+	d01 = np.einsum('ij,ij->i', v0, v1)
+	d11 = np.einsum('ij,ij->i', v1, v1)
+	d20 = np.einsum('ij,ij->i', v2, v0)
+	d21 = np.einsum('ij,ij->i', v2, v1)
+	denominator = d00 * d11 - d01 * d01
+	degenerate = np.abs(denominator) < 1e-20
+	denominator[degenerate] = 1.0
+	v = (d11 * d20 - d01 * d21) / denominator
+	w = (d00 * d21 - d01 * d20) / denominator
+	coords = np.stack((1.0 - v - w, v, w), axis=1)
+	coords[degenerate] = (1.0, 0.0, 0.0)
+	# Nearest points lie on the triangle; clamp round-off so weights stay convex.
+	np.clip(coords, 0.0, 1.0, out=coords)
+	coords /= coords.sum(axis=1, keepdims=True)
+	return coords
+
+class SurfaceProjection:
+	# Maps every destination vertex to a point on the nearest source triangle. The same projection
+	# interpolates any per-vertex source data: weights, shape key deltas or per-vertex UVs.
+	def __init__(self, triangle_vertices, barycentric, n_source_vertices):
+		self.triangle_vertices = triangle_vertices
+		self.barycentric = barycentric
+		self.n_source_vertices = n_source_vertices
+
+	@classmethod
+	def from_objects(cls, src_obj, dest_obj):
+		src_coords = mesh_io.get_world_vertex_coordinates(src_obj)
+		dest_coords = mesh_io.get_world_vertex_coordinates(dest_obj)
+		triangles = get_loop_triangles(src_obj)
+		bvh = BVHTree.FromPolygons(src_coords.tolist(), triangles.tolist(), all_triangles=True)
+		locations = np.empty_like(dest_coords)
+		triangle_indices = np.zeros(len(dest_coords), dtype=np.int64)
+		for i, co in enumerate(dest_coords):
+			location, _, index, _ = bvh.find_nearest(co)
+			if index is None:
+				locations[i] = co
+				continue
+			locations[i] = location
+			triangle_indices[i] = index
+		triangle_vertices = triangles[triangle_indices]
+		barycentric = barycentric_coordinates(
+			locations,
+			src_coords[triangle_vertices[:, 0]],
+			src_coords[triangle_vertices[:, 1]],
+			src_coords[triangle_vertices[:, 2]]
+		)
+		return cls(triangle_vertices, barycentric, len(src_coords))
+
+	def interpolate(self, values):
+		values = np.asarray(values)
+		result = self.barycentric[:, 0, None] * values[self.triangle_vertices[:, 0]]
+		result += self.barycentric[:, 1, None] * values[self.triangle_vertices[:, 1]]
+		result += self.barycentric[:, 2, None] * values[self.triangle_vertices[:, 2]]
+		return result
+
+	def barycentric_matrix(self):
+		# (n_dest, n_source) with the three barycentric weights of every destination vertex per row.
+		from scipy.sparse import csr_matrix
+		n_dest = len(self.barycentric)
+		return csr_matrix(
+			(self.barycentric.ravel(), self.triangle_vertices.ravel(), np.arange(0, 3 * n_dest + 1, 3)),
+			shape=(n_dest, self.n_source_vertices)
+		)
+
+	def transfer_weights(self, vertices, groups, weights, n_groups, max_influences=0):
+		# Interpolates the COO weights as a sparse product, so memory follows the number of influences
+		# rather than vertices x groups.
+		from scipy.sparse import csr_matrix
+		source = csr_matrix((np.asarray(weights, dtype=np.float32), (vertices, groups)), shape=(self.n_source_vertices, n_groups))
+		result = (self.barycentric_matrix().astype(np.float32) @ source).tocsr()
+		result.sum_duplicates()
+		result.eliminate_zeros()
+		counts = np.diff(result.indptr)
+		rows = np.repeat(np.arange(len(counts)), counts)
+		if max_influences and max_influences < n_groups:
+			# Rank each row's entries by weight and drop everything past the first max_influences.
+			order = np.lexsort((-result.data, rows))
+			rank = np.arange(len(order)) - result.indptr[rows[order]]
+			result.data[order[rank >= max_influences]] = 0.0
+			result.eliminate_zeros()
+			counts = np.diff(result.indptr)
+			rows = np.repeat(np.arange(len(counts)), counts)
+		totals = np.bincount(rows, weights=result.data, minlength=len(counts))
+		result.data /= totals[rows].astype(np.float32)
+		return rows, result.indices.astype(np.int64), result.data
+
+_projection_cache = OrderedDict()
+_projection_cache_limit = 8
+
+def _projection_key(src_obj, dest_obj):
+	digest = hashlib.sha1()
+	for obj in (src_obj, dest_obj):
+		digest.update(mesh_io.get_world_vertex_coordinates(obj).astype(np.float32).tobytes())
+		digest.update(get_loop_triangles(obj).tobytes())
+	return digest.hexdigest()
+
+def get_surface_projection(src_obj, dest_obj):
+	key = _projection_key(src_obj, dest_obj)
+	projection = _projection_cache.get(key)
+	if projection is None:
+		projection = SurfaceProjection.from_objects(src_obj, dest_obj)
+		_projection_cache[key] = projection
+		while len(_projection_cache) > _projection_cache_limit:
+			_projection_cache.popitem(last=False)
+	else:
+		_projection_cache.move_to_end(key)
+	return projection
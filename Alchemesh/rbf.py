@@ -0,0 +1,512 @@
+import os
+import sys
+import ctypes
+import numpy as np
+from itertools import repeat
+from .parallel import create_executor
+
+# Basis functions share PyGeM's names so the `auto_rig_retarget_rbf` enum maps directly onto them.
+
+def gaussian_spline(r, radius):
+	return np.exp(-(r * r) / (radius * radius))
+
+def multi_quadratic_biharmonic_spline(r, radius):
+	return np.sqrt(r * r + radius * radius)
+
+def inv_multi_quadratic_biharmonic_spline(r, radius):
+	return 1.0 / np.sqrt(r * r + radius * radius)
+
+def thin_plate_spline(r, radius):
+	arg = r / radius
+	result = arg * arg
+	with np.errstate(divide='ignore', invalid='ignore'):
+		return np.where(arg > 0, result * np.log(arg), 0.0)
+
+def polyharmonic_spline(r, radius, k=2):
+	r_sc = r / radius
+	if k & 1:
+		return np.power(r_sc, k)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		return np.where(r_sc > 0, np.power(r_sc, k) * np.log(r_sc), 0.0)
+
+BASIS_FUNCTIONS = {
+	'gaussian_spline': gaussian_spline,
+	'multi_quadratic_biharmonic_spline': multi_quadratic_biharmonic_spline,
+	'inv_multi_quadratic_biharmonic_spline': inv_multi_quadratic_biharmonic_spline,
+	'thin_plate_spline': thin_plate_spline,
+	'polyharmonic_spline': polyharmonic_spline,
+}
+
+# Compactly supported kernels: zero beyond `radius`, so the system matrix is sparse.
+
+def wendland_c2_spline(r, radius):
+	q = np.clip(1.0 - r / radius, 0.0, None)
+	return q ** 4 * (4.0 * r / radius + 1.0)
+
+SPARSE_BASIS_FUNCTIONS = {
+	'wendland_c2_spline': wendland_c2_spline,
+}
+
+def pairwise_distances(a, b):
+	a_sq = np.einsum('ij,ij->i', a, a)[:, None]
+	b_sq = np.einsum('ij,ij->i', b, b)[None, :]
+	sq = a_sq + b_sq - 2.0 * (a @ b.T)
+	np.maximum(sq, 0.0, out=sq)
+	return np.sqrt(sq, out=sq)
+
+def available_memory(default=1 << 30):
+	try:
+		if sys.platform == "win32":
+			class MEMORYSTATUSEX(ctypes.Structure):
+				_fields_ = [
+					("dwLength", ctypes.c_ulong),
+					("dwMemoryLoad", ctypes.c_ulong),
+					("ullTotalPhys", ctypes.c_ulonglong),
+					("ullAvailPhys", ctypes.c_ulonglong),
+					("ullTotalPageFile", ctypes.c_ulonglong),
+					("ullAvailPageFile", ctypes.c_ulonglong),
+					("ullTotalVirtual", ctypes.c_ulonglong),
+					("ullAvailVirtual", ctypes.c_ulonglong),
+					("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+				]
+			status = MEMORYSTATUSEX()
+			status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+			if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+				return int(status.ullAvailPhys)
+		else:
+			return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+	except (AttributeError, ValueError, OSError):
+		pass
+	return default
+
+DEFAULT_MEMORY_FRACTION = 0.25
+
+def evaluation_block_size(n_columns, memory_fraction=DEFAULT_MEMORY_FRACTION, temporaries=3):
+	# Rows per block so the (rows x n_columns) float64 kernel temporaries stay within a share of free RAM.
+	budget = available_memory() * memory_fraction
+	return max(1, int(budget // (max(n_columns, 1) * 8 * temporaries)))
+
+class RBF:
+	basis_functions = BASIS_FUNCTIONS
+
+	def __init__(self, original_control_points, deformed_control_points, func='polyharmonic_spline', radius=0.5, weights=None):
+		if func not in self.basis_functions:
+			raise ValueError(f"Unknown RBF basis function: {func}")
+		self.original_control_points = np.ascontiguousarray(original_control_points, dtype=np.float64).reshape(-1, 3)
+		self.deformed_control_points = np.ascontiguousarray(deformed_control_points, dtype=np.float64).reshape(-1, 3)
+		if len(self.original_control_points) != len(self.deformed_control_points):
+			raise ValueError("Original and deformed control points must have the same length.")
+		self.func = func
+		self.basis = self.basis_functions[func]
+		self.radius = radius
+		self.weights = self._solve() if weights is None else np.asarray(weights, dtype=np.float64)
+
+	@property
+	def n_control_points(self):
+		return len(self.original_control_points)
+
+	def to_arrays(self):
+		return {
+			"kind": "global",
+			"original_control_points": self.original_control_points,
+			"deformed_control_points": self.deformed_control_points,
+			"func": self.func,
+			"radius": self.radius,
+			"weights": self.weights,
+		}
+
+	def _system_matrix(self):
+		# Kernel block bordered by the affine terms [1, x, y, z], as in PyGeM.
+		points = self.original_control_points
+		n = len(points)
+		H = np.zeros((n + 4, n + 4))
+		H[:n, :n] = self.basis(pairwise_distances(points, points), self.radius)
+		H[:n, n] = 1.0
+		H[n, :n] = 1.0
+		H[:n, n + 1:] = points
+		H[n + 1:, :n] = points.T
+		return H
+
+	def _solve(self):
+		rhs = np.zeros((self.n_control_points + 4, 3))
+		rhs[:self.n_control_points] = self.deformed_control_points
+		# A single factorization covers all three coordinate right-hand sides.
+		return np.linalg.solve(self._system_matrix(), rhs)
+
+	def _evaluate(self, points):
+		n = self.n_control_points
+		result = self.basis(pairwise_distances(points, self.original_control_points), self.radius) @ self.weights[:n]
+		result += self.weights[n]
+		result += points @ self.weights[n + 1:]
+		return result
+
+	def _block_size(self, memory_fraction):
+		return evaluation_block_size(self.n_control_points, memory_fraction)
+
+	def __call__(self, points, block_size=None, progress=None, memory_fraction=DEFAULT_MEMORY_FRACTION):
+		# Concurrent evaluations must split the memory budget: pass memory_fraction / workers to each.
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+		if block_size is None:
+			block_size = self._block_size(memory_fraction)
+		if len(points) <= block_size:
+			result = self._evaluate(points)
+			if progress is not None:
+				progress(1.0)
+			return result
+		result = np.empty_like(points)
+		for start in range(0, len(points), block_size):
+			end = min(start + block_size, len(points))
+			result[start:end] = self._evaluate(points[start:end])
+			if progress is not None:
+				progress(end / len(points))
+		return result
+
+def _import_scipy_sparse():
+	try:
+		from scipy.spatial import cKDTree
+		from scipy.sparse import coo_matrix
+		from scipy.sparse.linalg import splu
+	except ImportError as e:
+		raise ImportError("Sparse RBF kernels require SciPy, install it from the AlcheMesh add-on preferences.") from e
+	return cKDTree, coo_matrix, splu
+
+class SparseRBF(RBF):
+	# The affine part is fitted by least squares first; the compact kernel then interpolates
+	# the residual, which keeps the system symmetric positive definite and purely sparse.
+	basis_functions = SPARSE_BASIS_FUNCTIONS
+	# The support follows the control point spacing rather than the shared radius, which is sized for the
+	# global kernels and would cover most of a body-scale mesh: a multiple of the median distance to the
+	# k-th nearest control point keeps a few dozen neighbours per row.
+	support_neighbours = 8
+	support_scale = 2.0
+
+	@property
+	def tree(self):
+		if getattr(self, "_tree", None) is None:
+			cKDTree, _, _ = _import_scipy_sparse()
+			self._tree = cKDTree(self.original_control_points)
+		return self._tree
+
+	@property
+	def support(self):
+		if getattr(self, "_support", None) is None:
+			k = min(self.support_neighbours, self.n_control_points - 1)
+			spacing = 0.0
+			if k > 0:
+				distances, _ = self.tree.query(self.original_control_points, k=k + 1)
+				spacing = float(np.median(distances[:, k]))
+			self._support = self.support_scale * spacing if spacing > 0.0 else self.radius
+		return self._support
+
+	def _kernel_matrix(self, points, tree=None):
+		_, coo_matrix, _ = _import_scipy_sparse()
+		if tree is None:
+			cKDTree, _, _ = _import_scipy_sparse()
+			tree = cKDTree(points)
+		pairs = tree.sparse_distance_matrix(self.tree, self.support, output_type='ndarray')
+		values = self.basis(pairs['v'], self.support)
+		return coo_matrix((values, (pairs['i'], pairs['j'])), shape=(len(points), self.n_control_points))
+
+	def _solve(self):
+		_, _, splu = _import_scipy_sparse()
+		points = self.original_control_points
+		n = len(points)
+		affine_basis = np.hstack((np.ones((n, 1)), points))
+		affine, _, _, _ = np.linalg.lstsq(affine_basis, self.deformed_control_points, rcond=None)
+		residual = self.deformed_control_points - affine_basis @ affine
+		kernel = self._kernel_matrix(points, tree=self.tree).tocsc()
+		weights = np.empty((n + 4, 3))
+		weights[:n] = splu(kernel).solve(residual)
+		weights[n:] = affine
+		return weights
+
+	def _evaluate(self, points):
+		n = self.n_control_points
+		result = self._kernel_matrix(points).tocsr() @ self.weights[:n]
+		result += self.weights[n]
+		result += points @ self.weights[n + 1:]
+		return result
+
+	def _block_size(self, memory_fraction):
+		# Budget for neighbour lists rather than a dense row per evaluated point.
+		return evaluation_block_size(256, memory_fraction)
+
+def make_rbf(original_control_points, deformed_control_points, func='polyharmonic_spline', radius=0.5, weights=None):
+	rbf_class = SparseRBF if func in SPARSE_BASIS_FUNCTIONS else RBF
+	return rbf_class(original_control_points, deformed_control_points, func=func, radius=radius, weights=weights)
+
+class IncrementalRBFSystem:
+	# Keeps the inverse of the bordered RBF system in [affine, control points] order so new control
+	# points can be appended with a block (Schur complement) update instead of a full re-solve.
+	def __init__(self, points, basis, radius):
+		self.basis = basis
+		self.radius = radius
+		self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+		n = len(self.points)
+		A = np.zeros((n + 4, n + 4))
+		A[0, 4:] = 1.0
+		A[4:, 0] = 1.0
+		A[1:4, 4:] = self.points.T
+		A[4:, 1:4] = self.points
+		A[4:, 4:] = basis(pairwise_distances(self.points, self.points), radius)
+		self.inverse = np.linalg.inv(A)
+
+	def add_points(self, new_points):
+		new_points = np.asarray(new_points, dtype=np.float64).reshape(-1, 3)
+		B = np.empty((len(self.inverse), len(new_points)))
+		B[0] = 1.0
+		B[1:4] = new_points.T
+		B[4:] = self.basis(pairwise_distances(self.points, new_points), self.radius)
+		C = self.basis(pairwise_distances(new_points, new_points), self.radius)
+		inverse_B = self.inverse @ B
+		schur_inverse = np.linalg.inv(C - B.T @ inverse_B)
+		top_right = -inverse_B @ schur_inverse
+		size = len(self.inverse) + len(new_points)
+		inverse = np.empty((size, size))
+		inverse[:len(self.inverse), :len(self.inverse)] = self.inverse - top_right @ inverse_B.T
+		inverse[:len(self.inverse), len(self.inverse):] = top_right
+		inverse[len(self.inverse):, :len(self.inverse)] = top_right.T
+		inverse[len(self.inverse):, len(self.inverse):] = schur_inverse
+		self.inverse = inverse
+		self.points = np.vstack((self.points, new_points))
+
+	def weights(self, deformed_points):
+		rhs = np.zeros((len(self.inverse), 3))
+		rhs[4:] = deformed_points
+		solution = self.inverse @ rhs
+		# Reorder to the RBF layout: kernel weights first, then constant and linear terms.
+		return np.vstack((solution[4:], solution[:4]))
+
+def _spread_worst(points, errors, count, max_error, exclude, pool_factor=4):
+	# Take the worst-fit vertices, but spread each batch out so neighbouring vertices of one
+	# badly fitted region do not all enter the system at once and degrade its conditioning.
+	# Only vertices above the threshold that are not control points yet are candidates; picking a
+	# control point twice would make the system singular.
+	candidates = np.setdiff1d(np.flatnonzero(errors > max_error), exclude)
+	if len(candidates) == 0:
+		return candidates
+	pool_size = min(len(candidates), count * pool_factor)
+	pool = candidates[np.argpartition(errors[candidates], -pool_size)[-pool_size:]]
+	pool = pool[np.argsort(errors[pool])[::-1]]
+	distances = np.linalg.norm(points[pool] - points[pool[0]], axis=1)
+	chosen = [0]
+	for _ in range(1, count):
+		candidate = int(np.argmax(distances))
+		if distances[candidate] <= 0.0:
+			break
+		chosen.append(candidate)
+		np.minimum(distances, np.linalg.norm(points[pool] - points[pool[candidate]], axis=1), out=distances)
+	return pool[chosen]
+
+def fit_adaptive_rbf(original_points, deformed_points, func='polyharmonic_spline', radius=0.5, max_error=5e-4,
+		initial_indices=None, batch_size=64, max_control_points=None, patience=3, progress=None):
+	original_points = np.asarray(original_points, dtype=np.float64).reshape(-1, 3)
+	deformed_points = np.asarray(deformed_points, dtype=np.float64).reshape(-1, 3)
+	n = len(original_points)
+	max_control_points = min(n, max_control_points or n)
+	indices = np.unique(np.asarray(initial_indices if initial_indices is not None else np.arange(0, n, max(1, n // 64)), dtype=np.int64))
+	incremental = func in BASIS_FUNCTIONS
+	system = IncrementalRBFSystem(original_points[indices], BASIS_FUNCTIONS[func], radius) if incremental else None
+	# Global kernels such as the gaussian can get worse as points are added; keep the best fit seen and
+	# give up once `patience` batches in a row failed to improve on it.
+	best = None
+	batches_without_improvement = 0
+	while True:
+		rbf = None
+		if incremental:
+			rbf = RBF(original_points[indices], deformed_points[indices], func=func, radius=radius, weights=system.weights(deformed_points[indices]))
+			# Updated inverses accumulate round-off; fall back to a fresh solve once the interpolation conditions drift.
+			drift = np.abs(rbf(original_points[indices]) - deformed_points[indices]).max()
+			if drift > 0.01 * max_error:
+				system = IncrementalRBFSystem(original_points[indices], BASIS_FUNCTIONS[func], radius)
+				rbf = None
+		if rbf is None:
+			rbf = make_rbf(original_points[indices], deformed_points[indices], func=func, radius=radius)
+		errors = np.linalg.norm(rbf(original_points) - deformed_points, axis=1)
+		errors[indices] = 0.0
+		worst_error = errors.max()
+		if progress is not None:
+			progress(len(indices), worst_error)
+		if best is None or worst_error < best[0]:
+			best = (worst_error, rbf, indices)
+			batches_without_improvement = 0
+		else:
+			batches_without_improvement += 1
+		if worst_error <= max_error or len(indices) >= max_control_points or batches_without_improvement >= patience:
+			return best[1], best[2]
+		count = min(batch_size, max_control_points - len(indices))
+		new_indices = _spread_worst(original_points, errors, count, max_error, indices)
+		if len(new_indices) == 0:
+			return best[1], best[2]
+		if incremental:
+			try:
+				system.add_points(original_points[new_indices])
+			except np.linalg.LinAlgError:
+				system = IncrementalRBFSystem(original_points[np.concatenate((indices, new_indices))], BASIS_FUNCTIONS[func], radius)
+		indices = np.concatenate((indices, new_indices))
+
+def _solve_cell(original_control_points, deformed_control_points, func, radius):
+	return make_rbf(original_control_points, deformed_control_points, func=func, radius=radius).weights
+
+def partition_weight(t):
+	q = np.clip(1.0 - t, 0.0, None)
+	return q ** 4 * (4.0 * t + 1.0)
+
+class PartitionOfUnityRBF:
+	# Overlapping spherical cells around an adaptive grid each get an independent local RBF;
+	# the local interpolants are blended with normalized Wendland weights.
+	min_cell_points = 32
+	max_cell_points_factor = 2
+
+	def __init__(self, original_control_points, deformed_control_points, func='polyharmonic_spline', radius=0.5,
+			points_per_cell=2000, overlap=1.5, workers=0, use_processes=False, cells=None):
+		self.original_control_points = np.ascontiguousarray(original_control_points, dtype=np.float64).reshape(-1, 3)
+		self.deformed_control_points = np.ascontiguousarray(deformed_control_points, dtype=np.float64).reshape(-1, 3)
+		if len(self.original_control_points) != len(self.deformed_control_points):
+			raise ValueError("Original and deformed control points must have the same length.")
+		self.func = func
+		self.radius = radius
+		self.points_per_cell = points_per_cell
+		self.overlap = overlap
+		if cells is None:
+			self.centers, self.support_radii, self.cell_indices = self._partition()
+			self.cell_weights = self._solve(workers, use_processes)
+		else:
+			self.centers, self.support_radii, self.cell_indices, self.cell_weights = cells
+		self._local_rbfs = {}
+
+	@property
+	def n_control_points(self):
+		return len(self.original_control_points)
+
+	def _partition(self):
+		# Cells are sized by the points inside their support sphere, which is what each local system
+		# solves, rather than by the points inside the grid cell: with the overlap every point sits in
+		# several supports. A nearest-k query caps each cell so memory stays bounded by the cell size.
+		cKDTree, _, _ = _import_scipy_sparse()
+		points = self.original_control_points
+		n = len(points)
+		tree = cKDTree(points)
+		lower = points.min(axis=0)
+		extent = points.max(axis=0) - lower
+		extent = np.maximum(extent, max(extent.max(), 1e-6) * 1e-3)
+		target_cells = max(1, int(np.ceil(n / self.points_per_cell)))
+		cell_size = (np.prod(extent) / target_cells) ** (1.0 / 3.0)
+		def cell_grid(cell_size):
+			occupied = np.unique(np.floor((points - lower) / cell_size).astype(np.int64), axis=0)
+			centers = lower + (occupied + 0.5) * cell_size
+			support = self.overlap * cell_size * np.sqrt(3.0) * 0.5
+			return centers, support, tree.query_ball_point(centers, support, return_length=True)
+		# Surfaces only occupy a fraction of the volume grid and grow with the square of the cell size.
+		for _ in range(8):
+			centers, support, counts = cell_grid(cell_size)
+			points_per_support = counts.mean()
+			if points_per_support <= 1.5 * self.points_per_cell or points_per_support <= self.min_cell_points:
+				break
+			cell_size /= np.sqrt(points_per_support / self.points_per_cell)
+		else:
+			# The last iteration shrank the cells, so the grid must be rebuilt at the final size.
+			centers, support, counts = cell_grid(cell_size)
+		max_points = min(n, self.max_cell_points_factor * self.points_per_cell)
+		min_points = min(n, self.min_cell_points)
+		support_radii = np.empty(len(centers))
+		cell_indices = []
+		for i, (center, count) in enumerate(zip(centers, counts)):
+			if min_points <= count <= max_points:
+				indices = np.asarray(tree.query_ball_point(center, support), dtype=np.int64)
+				radius = support
+			else:
+				distances, indices = tree.query(center, k=max(min(count, max_points), min_points))
+				distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+				radius = distances.max() * 1.01 + 1e-9
+			support_radii[i] = radius
+			cell_indices.append(np.sort(indices))
+		return centers, support_radii, cell_indices
+
+	def _solve(self, workers, use_processes):
+		originals = [self.original_control_points[indices] for indices in self.cell_indices]
+		deformeds = [self.deformed_control_points[indices] for indices in self.cell_indices]
+		if len(self.cell_indices) == 1:
+			return [_solve_cell(originals[0], deformeds[0], self.func, self.radius)]
+		with create_executor(workers, use_processes) as executor:
+			return list(executor.map(_solve_cell, originals, deformeds, repeat(self.func), repeat(self.radius)))
+
+	def local_rbf(self, cell):
+		rbf = self._local_rbfs.get(cell)
+		if rbf is None:
+			indices = self.cell_indices[cell]
+			rbf = make_rbf(
+				self.original_control_points[indices],
+				self.deformed_control_points[indices],
+				func=self.func,
+				radius=self.radius,
+				weights=self.cell_weights[cell]
+			)
+			self._local_rbfs[cell] = rbf
+		return rbf
+
+	def __call__(self, points, block_size=None, progress=None, memory_fraction=DEFAULT_MEMORY_FRACTION):
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+		numerator = np.zeros_like(points)
+		denominator = np.zeros(len(points))
+		nearest_cell = np.zeros(len(points), dtype=np.int64)
+		nearest_distance = np.full(len(points), np.inf)
+		for cell, (center, support_radius) in enumerate(zip(self.centers, self.support_radii)):
+			scaled = np.linalg.norm(points - center, axis=1) / support_radius
+			closer = scaled < nearest_distance
+			nearest_cell[closer] = cell
+			nearest_distance[closer] = scaled[closer]
+			mask = scaled < 1.0
+			if mask.any():
+				weights = partition_weight(scaled[mask])
+				numerator[mask] += weights[:, None] * self.local_rbf(cell)(points[mask], block_size, memory_fraction=memory_fraction)
+				denominator[mask] += weights
+			if progress is not None:
+				progress((cell + 1) / len(self.centers))
+		# Points outside every support fall back to the closest cell's interpolant.
+		uncovered = np.flatnonzero(denominator <= 0.0)
+		for cell in np.unique(nearest_cell[uncovered]):
+			indices = uncovered[nearest_cell[uncovered] == cell]
+			numerator[indices] = self.local_rbf(cell)(points[indices], block_size, memory_fraction=memory_fraction)
+			denominator[indices] = 1.0
+		return numerator / denominator[:, None]
+
+	def to_arrays(self):
+		sizes = np.array([len(indices) for indices in self.cell_indices], dtype=np.int64)
+		return {
+			"kind": "partition",
+			"original_control_points": self.original_control_points,
+			"deformed_control_points": self.deformed_control_points,
+			"func": self.func,
+			"radius": self.radius,
+			"points_per_cell": self.points_per_cell,
+			"overlap": self.overlap,
+			"centers": self.centers,
+			"support_radii": self.support_radii,
+			"cell_sizes": sizes,
+			"cell_indices": np.concatenate(self.cell_indices),
+			"cell_weights": np.concatenate(self.cell_weights),
+		}
+
+def rbf_from_arrays(data):
+	kind = str(data.get("kind", "global"))
+	func = str(data["func"])
+	radius = float(data["radius"])
+	if kind == "global":
+		return make_rbf(data["original_control_points"], data["deformed_control_points"], func=func, radius=radius, weights=data["weights"])
+	if kind == "partition":
+		sizes = np.asarray(data["cell_sizes"])
+		split = np.cumsum(sizes)[:-1]
+		cell_indices = np.split(np.asarray(data["cell_indices"]), split)
+		# Each local system carries its four affine rows next to its kernel weights.
+		cell_weights = np.split(np.asarray(data["cell_weights"]), np.cumsum(sizes + 4)[:-1])
+		return PartitionOfUnityRBF(
+			data["original_control_points"],
+			data["deformed_control_points"],
+			func=func,
+			radius=radius,
+			points_per_cell=int(data["points_per_cell"]),
+			overlap=float(data["overlap"]),
+			cells=(np.asarray(data["centers"]), np.asarray(data["support_radii"]), cell_indices, cell_weights)
+		)
+	raise ValueError(f"Unknown RBF kind: {kind}")
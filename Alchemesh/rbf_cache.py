@@ -0,0 +1,95 @@
+import hashlib
+import os
+import uuid
+import zipfile
+import numpy as np
+from .rbf import rbf_from_arrays
+
+CACHE_EXTENSION = ".npz"
+
+def cache_key(src_coords, dest_coords, rbf_type, radius, proxy_level, **params):
+	digest = hashlib.sha1()
+	for coords in (src_coords, dest_coords):
+		coords = np.ascontiguousarray(coords, dtype=np.float32)
+		digest.update(str(coords.shape).encode())
+		digest.update(coords.tobytes())
+	digest.update(f"{rbf_type}|{radius!r}|{proxy_level}".encode())
+	for name in sorted(params):
+		digest.update(f"|{name}={params[name]!r}".encode())
+	return digest.hexdigest()
+
+class RBFCache:
+	def __init__(self, directory, max_size):
+		self.directory = directory
+		self.max_size = max_size
+
+	def _path(self, key):
+		return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+	def _entries(self):
+		if not os.path.isdir(self.directory):
+			return []
+		entries = []
+		for name in os.listdir(self.directory):
+			if not name.endswith(CACHE_EXTENSION):
+				continue
+			path = os.path.join(self.directory, name)
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			entries.append((stat.st_mtime, stat.st_size, path))
+		return entries
+
+	def load(self, key):
+		path = self._path(key)
+		if not os.path.isfile(path):
+			return None
+		try:
+			with np.load(path, allow_pickle=False) as data:
+				rbf = rbf_from_arrays({name: data[name] for name in data.files})
+		except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as e:
+			print(f"Discarding unreadable RBF cache entry {path}: {e}")
+			self.remove(key)
+			return None
+		# The modification time doubles as the LRU timestamp. Another process sharing the directory may
+		# have evicted the file since it was read; missing the touch is harmless.
+		try:
+			os.utime(path, None)
+		except OSError:
+			pass
+		return rbf
+
+	def store(self, key, rbf):
+		os.makedirs(self.directory, exist_ok=True)
+		path = self._path(key)
+		temp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp")
+		with open(temp_path, "wb") as file:
+			np.savez(file, **{name: np.asarray(value) for name, value in rbf.to_arrays().items()})
+		os.replace(temp_path, path)
+		self.evict()
+
+	def remove(self, key):
+		try:
+			os.remove(self._path(key))
+		except OSError:
+			pass
+
+	def evict(self):
+		entries = sorted(self._entries())
+		total_size = sum(size for _, size, _ in entries)
+		for _, size, path in entries:
+			if total_size <= self.max_size:
+				break
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			total_size -= size
+
+	def clear(self):
+		for _, _, path in self._entries():
+			try:
+				os.remove(path)
+			except OSError:
+				pass
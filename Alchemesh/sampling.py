@@ -0,0 +1,79 @@
+import numpy as np
+
+def farthest_point_sample(points, count, seed_indices=None):
+	points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+	n = len(points)
+	seed_indices = np.unique(np.asarray(seed_indices if seed_indices is not None else [], dtype=np.int64))
+	count = min(n, max(count, len(seed_indices)))
+	selected = np.empty(count, dtype=np.int64)
+	distances = np.full(n, np.inf)
+	for i, index in enumerate(seed_indices):
+		selected[i] = index
+		np.minimum(distances, np.linalg.norm(points - points[index], axis=1), out=distances)
+	start = len(seed_indices)
+	if start == 0 and count > 0:
+		# Start from the point farthest from the centroid so results do not depend on vertex order.
+		selected[0] = np.argmax(np.linalg.norm(points - points.mean(axis=0), axis=1))
+		distances = np.linalg.norm(points - points[selected[0]], axis=1)
+		start = 1
+	for i in range(start, count):
+		index = np.argmax(distances)
+		selected[i] = index
+		np.minimum(distances, np.linalg.norm(points - points[index], axis=1), out=distances)
+	return selected
+
+def _voxel_representatives(points, voxel_size, lower):
+	keys = np.floor((points - lower) / voxel_size).astype(np.int64)
+	_, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+	inverse = inverse.ravel()
+	means = np.zeros((len(counts), 3))
+	np.add.at(means, inverse, points)
+	means /= counts[:, None]
+	distances = np.linalg.norm(points - means[inverse], axis=1)
+	# Per voxel, keep the vertex nearest to the voxel's centroid.
+	order = np.lexsort((distances, inverse))
+	first = np.ones(len(order), dtype=bool)
+	first[1:] = inverse[order[1:]] != inverse[order[:-1]]
+	return order[first]
+
+def voxel_grid_sample(points, count, iterations=24):
+	points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+	n = len(points)
+	if count >= n:
+		return np.arange(n)
+	lower = points.min(axis=0)
+	low, high = 0.0, float(np.max(points.max(axis=0) - lower)) + 1e-9
+	best = None
+	# Bisect the voxel size until the number of occupied voxels meets the requested budget.
+	for _ in range(iterations):
+		voxel_size = 0.5 * (low + high)
+		if voxel_size <= 0.0:
+			break
+		selected = _voxel_representatives(points, voxel_size, lower)
+		if len(selected) > count:
+			low = voxel_size
+		else:
+			best = selected
+			high = voxel_size
+		if best is not None and len(best) >= 0.98 * count:
+			break
+	if best is None:
+		best = _voxel_representatives(points, high, lower)
+	return np.sort(best)
+
+def displacement_feature_indices(original_points, deformed_points, fraction):
+	displacement = np.linalg.norm(np.asarray(deformed_points) - np.asarray(original_points), axis=1)
+	count = int(round(len(displacement) * fraction))
+	if count <= 0:
+		return np.empty(0, dtype=np.int64)
+	return np.argpartition(displacement, -count)[-count:]
+
+def select_control_indices(original_points, deformed_points, method, count, feature_indices=None):
+	feature_indices = np.asarray(feature_indices if feature_indices is not None else [], dtype=np.int64)
+	if method == 'FARTHEST':
+		return np.sort(farthest_point_sample(original_points, count, feature_indices))
+	if method == 'VOXEL':
+		budget = max(count - len(feature_indices), 0)
+		selected = voxel_grid_sample(original_points, budget) if budget else np.empty(0, dtype=np.int64)
+		return np.union1d(selected, feature_indices)
+	raise ValueError(f"Unknown control point sampling method: {method}")
@@ -0,0 +1,99 @@
+import numpy as np
+from . import mesh_io
+
+class SparseShapeKey:
+	# A shape key stored as the vertices it moves and their offsets from the basis.
+	__slots__ = ("name", "indices", "deltas")
+
+	def __init__(self, name, indices, deltas):
+		self.name = name
+		self.indices = indices
+		self.deltas = deltas
+
+	@property
+	def nbytes(self):
+		return self.indices.nbytes + self.deltas.nbytes
+
+	def expand(self, basis, out=None):
+		if out is None:
+			out = np.empty_like(basis)
+		out[:] = basis
+		out[self.indices] += self.deltas
+		return out
+
+def sparse_shape_key(name, basis, coords, tolerance=0.0):
+	deltas = coords - basis
+	indices = np.flatnonzero(np.abs(deltas).max(axis=1) > tolerance).astype(np.int32)
+	return SparseShapeKey(name, indices, deltas[indices])
+
+def get_basis_coordinates(obj):
+	if obj.data.shape_keys is None:
+		return mesh_io.get_vertex_coordinates(obj).astype(np.float32)
+	return mesh_io.get_shape_key_coordinates(obj.data.shape_keys.reference_key).reshape(-1, 3)
+
+def read_sparse_shape_keys(obj, names=None, tolerance=0.0):
+	shape_keys = obj.data.shape_keys
+	n_vertices = len(obj.data.vertices)
+	basis = get_basis_coordinates(obj)
+	if shape_keys is None:
+		return basis, []
+	reference_key = shape_keys.reference_key
+	coords = np.empty(n_vertices * 3, dtype=np.float32)
+	keys = []
+	for key_block in shape_keys.key_blocks:
+		if key_block == reference_key or (names is not None and key_block.name not in names):
+			continue
+		mesh_io.get_shape_key_coordinates(key_block, coords)
+		keys.append(sparse_shape_key(key_block.name, basis, coords.reshape(-1, 3), tolerance))
+	return basis, keys
+
+def retarget_shape_keys(rbf, src_obj, dest_obj, basis, keys, progress=None):
+	# The moved vertices of every key and the basis under them are evaluated in one RBF call;
+	# each retargeted delta is the difference of the two, expressed in the target's local space.
+	if not keys:
+		return []
+	indices = np.concatenate([key.indices for key in keys])
+	moved = basis[indices].astype(np.float64) + np.concatenate([key.deltas for key in keys])
+	unique, inverse = np.unique(indices, return_inverse=True)
+	points = mesh_io.to_world(src_obj, np.concatenate((basis[unique].astype(np.float64), moved)))
+	deformed = mesh_io.from_world(dest_obj, rbf(points, progress=progress))
+	deltas = (deformed[len(unique):] - deformed[:len(unique)][inverse.ravel()]).astype(np.float32)
+	offsets = np.cumsum([len(key.indices) for key in keys])[:-1]
+	return [SparseShapeKey(key.name, key.indices, key_deltas) for key, key_deltas in zip(keys, np.split(deltas, offsets))]
+
+def project_shape_keys(projection, keys, matrix=None, tolerance=0.0):
+	# The projection matches vertices in world space; `matrix` rotates and scales the source deltas into
+	# the destination's local space (see mesh_io.local_to_local_matrix). None keeps them as they are.
+	source = np.zeros((projection.n_source_vertices, 3), dtype=np.float32)
+	projected = []
+	for key in keys:
+		source[key.indices] = key.deltas if matrix is None else key.deltas @ matrix.T
+		deltas = projection.interpolate(source)
+		source[key.indices] = 0.0
+		projected.append(sparse_shape_key(key.name, 0.0, deltas, tolerance))
+	return projected
+
+def write_sparse_shape_keys(obj, basis, keys, only_changed=False, progress=None):
+	# Keys are expanded one at a time into a single reused buffer right before foreach_set.
+	basis = np.ascontiguousarray(basis, dtype=np.float32).reshape(-1, 3)
+	if len(basis) != len(obj.data.vertices):
+		raise ValueError("Mismatch in the number of vertices.")
+	if obj.data.shape_keys is None:
+		obj.shape_key_add(name="Basis", from_mix=False)
+	key_blocks = obj.data.shape_keys.key_blocks
+	coords = np.empty_like(basis)
+	current = np.empty(basis.size, dtype=np.float32)
+	written = 0
+	for index, key in enumerate(keys):
+		if progress:
+			progress((index + 1) / len(keys))
+		key.expand(basis, coords)
+		key_block = key_blocks.get(key.name)
+		if key_block is None:
+			key_block = obj.shape_key_add(name=key.name, from_mix=False)
+		elif only_changed and np.array_equal(mesh_io.get_shape_key_coordinates(key_block, current), coords.ravel()):
+			continue
+		mesh_io.set_shape_key_coordinates(key_block, coords)
+		written += 1
+	obj.data.update()
+	return written
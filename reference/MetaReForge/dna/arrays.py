@@ -0,0 +1,250 @@
+import itertools
+import threading
+import weakref
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+
+def _array(values: Sequence, dtype) -> np.ndarray:
+    return np.fromiter(values, dtype=dtype, count=len(values))
+
+
+def _columns(dtype, *columns: Sequence) -> np.ndarray:
+    array = np.empty((len(columns[0]), len(columns)), dtype=dtype)
+    for i, column in enumerate(columns):
+        array[:, i] = _array(column, dtype)
+    return array
+
+
+class DNAArrays:
+    """
+    Contiguous NumPy arrays over the array getters of a DNA reader.
+
+    The SWIG bindings return every array as a tuple of Python numbers, so indexing them element by
+    element is slow. Each getter is converted once per argument and memoized; the arrays are shared
+    between all users of the reader and are therefore read-only.
+
+    Attributes:
+        reader (dna.Reader): The wrapped reader. It must not be modified while the accessor is in use.
+    """
+
+    def __init__(self, reader: "dna.Reader", memo: Optional[Dict] = None):
+        self.reader = reader
+        self._memo = dict() if memo is None else memo
+
+    def _memoize(self, key: Tuple, build: Callable):
+        # The conversion runs outside the lock so unrelated readers and meshes convert concurrently.
+        # Two threads may race to build the same entry; the first one stored wins.
+        with _arrays_lock:
+            value = self._memo.get(key)
+        if value is not None:
+            return value
+        value = build()
+        for array in value if isinstance(value, tuple) else (value,):
+            array.flags.writeable = False
+        with _arrays_lock:
+            return self._memo.setdefault(key, value)
+
+    def vertex_positions(self, mesh_index: int) -> np.ndarray:
+        """
+        Returns the (N, 3) float32 vertex positions of a mesh, indexed by position index.
+        """
+        reader = self.reader
+        return self._memoize(("vertex_positions", mesh_index), lambda: _columns(
+            np.float32,
+            reader.getVertexPositionXs(mesh_index),
+            reader.getVertexPositionYs(mesh_index),
+            reader.getVertexPositionZs(mesh_index)
+        ))
+
+    def vertex_normals(self, mesh_index: int) -> np.ndarray:
+        """
+        Returns the (N, 3) float32 vertex normals of a mesh, indexed by normal index.
+        """
+        reader = self.reader
+        return self._memoize(("vertex_normals", mesh_index), lambda: _columns(
+            np.float32,
+            reader.getVertexNormalXs(mesh_index),
+            reader.getVertexNormalYs(mesh_index),
+            reader.getVertexNormalZs(mesh_index)
+        ))
+
+    def vertex_uvs(self, mesh_index: int) -> np.ndarray:
+        """
+        Returns the (N, 2) float32 texture coordinates of a mesh, indexed by texture coordinate index.
+        """
+        reader = self.reader
+        return self._memoize(("vertex_uvs", mesh_index), lambda: _columns(
+            np.float32,
+            reader.getVertexTextureCoordinateUs(mesh_index),
+            reader.getVertexTextureCoordinateVs(mesh_index)
+        ))
+
+    def layout_positions(self, mesh_index: int) -> np.ndarray:
+        return self._memoize(
+            ("layout_positions", mesh_index),
+            lambda: _array(self.reader.getVertexLayoutPositionIndices(mesh_index), np.int32)
+        )
+
+    def layout_normals(self, mesh_index: int) -> np.ndarray:
+        return self._memoize(
+            ("layout_normals", mesh_index),
+            lambda: _array(self.reader.getVertexLayoutNormalIndices(mesh_index), np.int32)
+        )
+
+    def layout_uvs(self, mesh_index: int) -> np.ndarray:
+        return self._memoize(
+            ("layout_uvs", mesh_index),
+            lambda: _array(self.reader.getVertexLayoutTextureCoordinateIndices(mesh_index), np.int32)
+        )
+
+    def faces(self, mesh_index: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the faces of a mesh flattened the way Mesh.loops and Mesh.polygons take them.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The vertex layout index of every loop, and the
+                                                       loop start and loop count of every face.
+        """
+        def build():
+            reader = self.reader
+            face_count = reader.getFaceCount(mesh_index)
+            faces = [reader.getFaceVertexLayoutIndices(mesh_index, face_index) for face_index in range(face_count)]
+            loop_totals = np.fromiter(map(len, faces), dtype=np.int32, count=face_count)
+            loop_vertices = np.fromiter(
+                itertools.chain.from_iterable(faces), dtype=np.int32, count=int(loop_totals.sum())
+            )
+            loop_starts = np.zeros(face_count, dtype=np.int32)
+            np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+            return loop_vertices, loop_starts, loop_totals
+        return self._memoize(("faces", mesh_index), build)
+
+    def joint_translations(self) -> np.ndarray:
+        """
+        Returns the (J, 3) float32 neutral joint translations, relative to the parent joints.
+        """
+        reader = self.reader
+        return self._memoize(("joint_translations",), lambda: _columns(
+            np.float32,
+            reader.getNeutralJointTranslationXs(),
+            reader.getNeutralJointTranslationYs(),
+            reader.getNeutralJointTranslationZs()
+        ))
+
+    def joint_rotations(self) -> np.ndarray:
+        """
+        Returns the (J, 3) float32 neutral joint rotations in degrees, relative to the parent joints.
+        """
+        reader = self.reader
+        return self._memoize(("joint_rotations",), lambda: _columns(
+            np.float32,
+            reader.getNeutralJointRotationXs(),
+            reader.getNeutralJointRotationYs(),
+            reader.getNeutralJointRotationZs()
+        ))
+
+    def joint_parents(self) -> np.ndarray:
+        """
+        Returns the parent index of every joint. The root joint is its own parent.
+        """
+        reader = self.reader
+        return self._memoize(("joint_parents",), lambda: np.fromiter(
+            map(reader.getJointParentIndex, range(reader.getJointCount())),
+            dtype=np.int32,
+            count=reader.getJointCount()
+        ))
+
+    def skin_weights(self, mesh_index: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the skin weights of a mesh in coordinate format.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The position index, joint index and weight of every influence.
+        """
+        def build():
+            reader = self.reader
+            joints, weights = [], []
+            for vertex_index in range(reader.getVertexPositionCount(mesh_index)):
+                joints.append(reader.getSkinWeightsJointIndices(mesh_index, vertex_index))
+                weights.append(reader.getSkinWeightsValues(mesh_index, vertex_index))
+            counts = np.fromiter(map(len, joints), dtype=np.int64, count=len(joints))
+            total = int(counts.sum())
+            return (
+                np.repeat(np.arange(len(counts), dtype=np.int32), counts),
+                np.fromiter(itertools.chain.from_iterable(joints), dtype=np.int32, count=total),
+                np.fromiter(itertools.chain.from_iterable(weights), dtype=np.float32, count=total)
+            )
+        return self._memoize(("skin_weights", mesh_index), build)
+
+    def blend_shape_channels(self, mesh_index: int) -> np.ndarray:
+        """
+        Returns the blend shape channel index of every blend shape target of a mesh.
+        """
+        reader = self.reader
+
+        def build():
+            target_count = reader.getBlendShapeTargetCount(mesh_index)
+            return np.fromiter(
+                (reader.getBlendShapeChannelIndex(mesh_index, target_index) for target_index in range(target_count)),
+                dtype=np.int32,
+                count=target_count
+            )
+        return self._memoize(("blend_shape_channels", mesh_index), build)
+
+    def blend_shape_target(self, mesh_index: int, target_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the position indices and the (K, 3) float32 deltas of a blend shape target.
+        """
+        reader = self.reader
+        return self._memoize(("blend_shape_target", mesh_index, target_index), lambda: (
+            _array(reader.getBlendShapeTargetVertexIndices(mesh_index, target_index), np.int32),
+            _columns(
+                np.float32,
+                reader.getBlendShapeTargetDeltaXs(mesh_index, target_index),
+                reader.getBlendShapeTargetDeltaYs(mesh_index, target_index),
+                reader.getBlendShapeTargetDeltaZs(mesh_index, target_index)
+            )
+        ))
+
+
+# Memoized arrays live exactly as long as their reader
+_reader_arrays = weakref.WeakKeyDictionary()
+_arrays_lock = threading.Lock()
+
+
+def get_dna_arrays(reader: "dna.Reader") -> DNAArrays:
+    """
+    Returns an accessor whose arrays are memoized for as long as the reader lives.
+
+    Only use it for readers that are not modified afterwards. Calibrated readers that run commands
+    should get their own DNAArrays(reader) instead, which memoizes for its own lifetime only.
+    """
+    with _arrays_lock:
+        try:
+            memo = _reader_arrays.get(reader)
+            if memo is None:
+                memo = _reader_arrays[reader] = dict()
+        except TypeError:
+            # The reader cannot be weakly referenced, the accessor keeps its own arrays
+            memo = None
+    return DNAArrays(reader, memo)
+
+
+def expand_to_layout(layout_positions: np.ndarray, position_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expands entries given per vertex position to every vertex layout entry that uses that position.
+
+    Args:
+        layout_positions (np.ndarray): The position index of every vertex layout entry.
+        position_indices (np.ndarray): The position index of every entry.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The layout index of every expanded entry and the entry it was expanded from.
+    """
+    order = np.argsort(layout_positions, kind="stable")
+    sorted_positions = layout_positions[order]
+    starts = np.searchsorted(sorted_positions, position_indices, side="left")
+    counts = np.searchsorted(sorted_positions, position_indices, side="right") - starts
+    entries = np.repeat(np.arange(len(position_indices)), counts)
+    offsets = np.arange(len(entries)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return order[np.repeat(starts, counts) + offsets], entries
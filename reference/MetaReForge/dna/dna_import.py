@@ -1,9 +1,10 @@
 import bpy
 import math
+import numpy as np
 from mathutils import Euler, Vector, Matrix
 from .io import get_reader
+from .arrays import get_dna_arrays, expand_to_layout
 from .libimport import dna, dnacalib, vtx_color
-from ..utils.common import limit
 
 
 def init_material(obj: bpy.types.Object, name: str):
@@ -27,98 +28,75 @@ def init_material(obj: bpy.types.Object, name: str):
 
 
 if dna and dnacalib:
-	def get_py_vert_positions_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> list:
-		x = reader.getVertexPositionXs(mesh_index)
-		y = reader.getVertexPositionYs(mesh_index)
-		z = reader.getVertexPositionZs(mesh_index)
-		
-		positions = []
-		for vertex_index in reader.getVertexLayoutPositionIndices(mesh_index):
-			position = Vector((x[vertex_index], y[vertex_index], z[vertex_index]))
-			positions.append(position)
-		return positions
+	def get_py_vert_positions_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> np.ndarray:
+		arrays = get_dna_arrays(reader)
+		return arrays.vertex_positions(mesh_index)[arrays.layout_positions(mesh_index)]
 	
-	def get_py_vtx_color_values(reader: "dna.BinaryStreamReader", mesh_index: int, vtc_color_values: list = None) -> list:
-		colors = []
-		for vertex_index in reader.getVertexLayoutPositionIndices(mesh_index):
-			colors.append(vtc_color_values[vertex_index])
-		return colors
-
-
-	def get_py_vert_normals_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> list:
-		x = reader.getVertexNormalXs(mesh_index)
-		y = reader.getVertexNormalYs(mesh_index)
-		z = reader.getVertexNormalZs(mesh_index)
-		normals = []
-		for normal_index in reader.getVertexLayoutNormalIndices(mesh_index):
-			normal = Vector((x[normal_index], y[normal_index], z[normal_index]))
-			normal.normalize()
-			# Append normalized normal vector
-			normals.append(normal)
-		return normals
-
-
-	def get_py_vert_uvs_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> list:
-		u = reader.getVertexTextureCoordinateUs(mesh_index)
-		v = reader.getVertexTextureCoordinateVs(mesh_index)
-		uvs = []
-		for uv_index in reader.getVertexLayoutTextureCoordinateIndices(mesh_index):
-			uvs.append((u[uv_index], v[uv_index]))
-		return uvs
+	def get_py_vtx_color_values(reader: "dna.BinaryStreamReader", mesh_index: int, vtc_color_values: np.ndarray = None) -> np.ndarray:
+		return np.asarray(vtc_color_values)[get_dna_arrays(reader).layout_positions(mesh_index)]
+
+
+	def get_py_vert_normals_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> np.ndarray:
+		arrays = get_dna_arrays(reader)
+		normals = arrays.vertex_normals(mesh_index)[arrays.layout_normals(mesh_index)]
+		lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+		return normals / np.maximum(lengths, 1e-12)
+
+
+	def get_py_vert_uvs_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> np.ndarray:
+		arrays = get_dna_arrays(reader)
+		return arrays.vertex_uvs(mesh_index)[arrays.layout_uvs(mesh_index)]
 
 
 	def get_py_vertex_groups_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> dict:
+		# Joint index -> (layout indices, weights)
+		arrays = get_dna_arrays(reader)
+		vertices, joints, weights = arrays.skin_weights(mesh_index)
+		layout_indices, entries = expand_to_layout(arrays.layout_positions(mesh_index), vertices)
+		joints = joints[entries]
+		order = np.argsort(joints, kind="stable")
+		joint_indices, starts = np.unique(joints[order], return_index=True)
 		vertex_groups = dict()
-		for layout_index, vertex_index in enumerate(reader.getVertexLayoutPositionIndices(mesh_index)):
-			vertex_joints = reader.getSkinWeightsJointIndices(mesh_index, vertex_index)
-			vertex_weights = reader.getSkinWeightsValues(mesh_index, vertex_index)
-			for joint_index, weight in zip(vertex_joints, vertex_weights):
-				if joint_index in vertex_groups:
-					group_indices, group_weights = vertex_groups[joint_index]
-				else:
-					group_indices, group_weights = [], []
-					vertex_groups[joint_index] = group_indices, group_weights
-
-				group_indices.append(layout_index)
-				group_weights.append(weight)
+		for joint_index, group in zip(joint_indices.tolist(), np.split(order, starts[1:])):
+			vertex_groups[joint_index] = layout_indices[group], weights[entries[group]]
 		return vertex_groups
 
 
-	def get_py_faces_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> list:
-		faces = []
-		for face_index in range(reader.getFaceCount(mesh_index)):
-			face = reader.getFaceVertexLayoutIndices(mesh_index, face_index)
-			faces.append(face)
-		return faces
-
+	def get_py_faces_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> tuple:
+		# (loop vertex layout indices, loop starts, loop totals)
+		return get_dna_arrays(reader).faces(mesh_index)
 
-	def get_shape_keys_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int) -> dict:
 
-		map = dict()
+	def get_shape_keys_from_dna(reader: "dna.BinaryStreamReader", mesh_index: int, threshold: float = 0.0) -> dict:
+		# Channel name -> (layout indices, deltas) of the layout vertices moved by more than the threshold
+		arrays = get_dna_arrays(reader)
+		layout_positions = arrays.layout_positions(mesh_index)
 		shape_targets = dict()
-		for layout_index, vertex_index in enumerate(reader.getVertexLayoutPositionIndices(mesh_index)):
-			if vertex_index in map:
-				map[vertex_index].append(layout_index)
-			else:
-				map[vertex_index] = [layout_index]
-
-		for target_index in range(reader.getBlendShapeTargetCount(mesh_index)):
-			delta_xs = reader.getBlendShapeTargetDeltaXs(mesh_index, target_index)
-			delta_ys = reader.getBlendShapeTargetDeltaYs(mesh_index, target_index)
-			delta_zs = reader.getBlendShapeTargetDeltaYs(mesh_index, target_index)
-			vertex_indices = reader.getBlendShapeTargetVertexIndices(mesh_index, target_index)
-			channel_index = reader.getBlendShapeChannelIndex(mesh_index, target_index)
+		for target_index, channel_index in enumerate(arrays.blend_shape_channels(mesh_index).tolist()):
+			vertex_indices, deltas = arrays.blend_shape_target(mesh_index, target_index)
+			moved = np.linalg.norm(deltas, axis=1) > threshold
+			layout_indices, entries = expand_to_layout(layout_positions, vertex_indices[moved])
 			channel_name = reader.getBlendShapeChannelName(channel_index)
-			deltas = dict()
-			for vertex_index, delta_x, delta_y, delta_z in zip(vertex_indices, delta_xs, delta_ys, delta_zs):
-				for layout_index in map[vertex_index]:
-					deltas[layout_index] = (delta_x, delta_y, delta_z)
-
-			shape_targets[channel_name] = deltas
+			shape_targets[channel_name] = layout_indices, deltas[moved][entries]
 
 		return shape_targets
 
 
+	def _fill_mesh(mesh: bpy.types.Mesh, verts: np.ndarray, faces: tuple) -> None:
+		loop_vertices, loop_starts, loop_totals = faces
+		mesh.vertices.add(len(verts))
+		mesh.vertices.foreach_set("co", np.ascontiguousarray(verts, dtype=np.float32).ravel())
+		mesh.loops.add(len(loop_vertices))
+		mesh.loops.foreach_set("vertex_index", loop_vertices)
+		mesh.polygons.add(len(loop_totals))
+		mesh.polygons.foreach_set("loop_start", loop_starts)
+		# Blender 4.0+ derives loop_total from the loop starts and exposes it read-only
+		if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+			mesh.polygons.foreach_set("loop_total", loop_totals)
+		mesh.update(calc_edges=True)
+		mesh.validate(clean_customdata=False)
+
+
 	def build_meshes(
 			dna_reader: 'dna.BinaryStreamReader',
 			lod0_only: bool = False,
@@ -136,18 +114,19 @@ if dna and dnacalib:
 		for mesh_index in range(dna_reader.getMeshCount()):
 			lod_index = mesh_lod_map.get(mesh_index, 0)
 			mesh_name = dna_reader.getMeshName(mesh_index)
+			if lod0_only and "lod0" not in mesh_name:
+				continue
 			vtx_color_mesh_index = vtx_color.VTX_COLOR_MESHES.index(mesh_name)
-			vtx_color_values = vtx_color.VTX_COLOR_VALUES[vtx_color_mesh_index]
-			vtx_color_values = [[limit(c, 0.0, 1.0) for c in color] + [1.0] for color in vtx_color_values]
+			vtx_color_values = np.clip(np.asarray(vtx_color.VTX_COLOR_VALUES[vtx_color_mesh_index], dtype=np.float32), 0.0, 1.0)
+			vtx_color_values = np.column_stack((vtx_color_values, np.ones(len(vtx_color_values), dtype=np.float32)))
 			verts = get_py_vert_positions_from_dna(dna_reader, mesh_index)
 			colors = get_py_vtx_color_values(dna_reader, mesh_index, vtx_color_values)
 			faces = get_py_faces_from_dna(dna_reader, mesh_index)
 			normals = get_py_vert_normals_from_dna(dna_reader, mesh_index)
 			uvs = get_py_vert_uvs_from_dna(dna_reader, mesh_index)
 			vertex_groups = get_py_vertex_groups_from_dna(dna_reader, mesh_index)
-			
-			if lod0_only and "lod0" not in mesh_name:
-				continue
+			loop_vertices = faces[0]
+
 			# Create a new mesh object
 			mesh = bpy.data.meshes.new(name="Mesh")
 			obj = bpy.data.objects.new(mesh_name, mesh)
@@ -159,32 +138,28 @@ if dna and dnacalib:
 			obj.select_set(True)
 
 			# Create the mesh data
-			mesh.from_pydata(verts, [], faces)
-			# Update the mesh and recalculate normals
-			mesh.update()
+			_fill_mesh(mesh, verts, faces)
 
 			# Create a vertex color layer
 			if len(mesh.vertex_colors) == 0:
 				mesh.vertex_colors.new()
 
 			color_layer = mesh.vertex_colors.active
+			color_layer.data.foreach_set("color", colors[loop_vertices].ravel())
 
 			# Set smooth shading for polygons
-			for poly in mesh.polygons:
-				poly.use_smooth = True
-				for _, loop_idx in enumerate(poly.loop_indices):
-					loop_vert_idx = mesh.loops[loop_idx].vertex_index
-					color_layer.data[loop_idx].color = colors[loop_vert_idx]  # Adding alpha value
+			mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
 
 			# Create split normals
+			loop_normals = normals[loop_vertices]
 			if hasattr(mesh, "use_auto_smooth"):
 				# blender <4.1
 				mesh.use_auto_smooth = False
 				mesh.create_normals_split()
-				mesh.normals_split_custom_set([normals[l.vertex_index] for l in mesh.loops])
+				mesh.normals_split_custom_set(loop_normals)
 				mesh.use_auto_smooth = True
 			else:
-				mesh.normals_split_custom_set([normals[l.vertex_index] for l in mesh.loops])
+				mesh.normals_split_custom_set(loop_normals)
 			mesh.update()
 
 			# Assign weights (vertex groups)
@@ -193,42 +168,32 @@ if dna and dnacalib:
 				vg = obj.vertex_groups.new(name=vg_name)
 				if joint_index in vertex_groups:
 					_v, _w = vertex_groups[joint_index]
-					for v, w in zip(_v, _w):
-						vg.add([v], w, 'REPLACE')
+					# One call per distinct weight instead of one per vertex
+					order = np.argsort(_w, kind="stable")
+					weights, starts = np.unique(_w[order], return_index=True)
+					for w, group in zip(weights.tolist(), np.split(order, starts[1:])):
+						vg.add(_v[group].tolist(), w, 'REPLACE')
 			# Create basis shape key
 			obj.shape_key_add(name='Basis')
 
-			shape_targets = get_shape_keys_from_dna(dna_reader, mesh_index)
-			for channel_name, shape_target in shape_targets.items():
+			shape_targets = get_shape_keys_from_dna(dna_reader, mesh_index, shape_key_threshold)
+			coordinates = np.empty_like(verts)
+			for channel_name, (layout_indices, deltas) in shape_targets.items():
 				shape_key = obj.shape_key_add(name=f"{mesh_name}__{channel_name}")
-				for layout_index, delta_tup in shape_target.items():
-					delta = Vector(delta_tup)
-					if delta.length > shape_key_threshold:
-						shape_key.data[layout_index].co += delta
+				coordinates[:] = verts
+				coordinates[layout_indices] += deltas
+				shape_key.data.foreach_set("co", coordinates.ravel())
 
 			# Create a UV layer if it doesn’t exist
 			uv_layer = mesh.uv_layers.new(name="DiffuseUV")
 			# Get the UV loop layer
 			mesh.uv_layers.active = uv_layer
 
-			_u = dna_reader.getVertexTextureCoordinateUs(mesh_index)
-			_v = dna_reader.getVertexTextureCoordinateVs(mesh_index)
-			uvs = []
-			for layout_index in dna_reader.getVertexLayoutTextureCoordinateIndices(mesh_index):
-				uv = (_u[layout_index], _v[layout_index])
-				uvs.append(uv)
-			
-
 			# Check if the number of UVs matches the number of vertices
 			if len(uvs) != len(mesh.vertices):
 				raise ValueError("The number of UV coordinates doesn't match the number of vertices in the mesh!")
 
-			# Iterate through polygons (faces) in the mesh
-			for loop in mesh.loops:
-				vertex_index = loop.vertex_index
-				
-				# Set the UV coordinates for this vertex
-				uv_layer.data[loop.index].uv = uvs[vertex_index]
+			uv_layer.data.foreach_set("uv", uvs[loop_vertices].ravel())
 
 			mat = init_material(obj, mesh_shader_mapping.get(mesh_name, mesh_name))
 			# Set viewport display properties
@@ -268,19 +233,15 @@ if dna and dnacalib:
 		# Dictionary to store created bones for easy parent access
 		created_bones = {}
 
-		x_loc = dna_reader.getNeutralJointTranslationXs()
-		y_loc = dna_reader.getNeutralJointTranslationYs()
-		z_loc = dna_reader.getNeutralJointTranslationZs()
-		x_rot = dna_reader.getNeutralJointRotationXs()
-		y_rot = dna_reader.getNeutralJointRotationYs()
-		z_rot = dna_reader.getNeutralJointRotationZs()
+		arrays = get_dna_arrays(dna_reader)
+		translations = arrays.joint_translations()
+		rotations = np.radians(arrays.joint_rotations())
+		parents = arrays.joint_parents()
 		
 		for i in range(dna_reader.getJointCount()):
 			joint_name = dna_reader.getJointName(i)
-			location = [x_loc[i], y_loc[i], z_loc[i]]
-			rotation = [x_rot[i], y_rot[i], z_rot[i]]
-			rotation = [math.radians(a) for a in rotation]
-			rotation = Euler(rotation, 'XYZ')
+			location = Vector(translations[i])
+			rotation = Euler(rotations[i], 'XYZ')
 
 			# Create a new edit bone
 			bone = edit_bones.new(joint_name)
@@ -291,7 +252,7 @@ if dna and dnacalib:
 				# Combining translation and rotation into a transformation matrix
 				bone.matrix = Matrix.Translation(location) @ rotation.to_matrix().to_4x4()
 			else:
-				parent_index = dna_reader.getJointParentIndex(i)
+				parent_index = int(parents[i])
 				parent_bone = created_bones[parent_index]
 				bone.parent = parent_bone
 				bone.length = 1.0  # Set the bone length (ensuring it's not zero)
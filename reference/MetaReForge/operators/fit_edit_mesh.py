@@ -53,7 +53,9 @@ class MRF_OT_transfer_shape(bpy.types.Operator):
                     num_retries += 1
                     final_sk = join_as_shape(source_basis_obj, source_final_obj, "FINAL_SHAPE", replace=True)
 
-                    if self.use_noise:
+                    # Only the Laplacian Deform modifier transfer binds to the noisy shape
+                    use_noise = self.use_noise and self.laplacian_iterations > 0
+                    if use_noise:
                         # Delete final delta noise key if it exists
                         remove_shape_key(source_basis_obj, "DELTA_NOISE")
                         # Create a delta noise shape key
@@ -79,7 +81,7 @@ class MRF_OT_transfer_shape(bpy.types.Operator):
                     )
                     break
                 except Exception as ex:
-                    if num_retries < self._max_retries and self.use_noise:
+                    if num_retries < self._max_retries and use_noise:
                         print(f"Retry {num_retries}/{self._max_retries}: {str(ex)}")
                     else:
                         raise ex
@@ -2,14 +2,17 @@ import bpy
 import traceback
 from typing import Dict, List
 from ..utils.blender.shape_keys import (
-    remove_shape_key,
     join_as_shape,
     copy_shape_key
 )
 from ..utils.blender.keep_state import EditorState
 from ..utils.blender.object import ensure_objects_visible
 from ..utils.blender.armature import transfer_rest_pose
-from ..utils.transfer_shape_key import add_delta_noise_shape_key, transfer_shapekeys
+from ..utils.transfer_shape_key import (
+    transfer_shapekeys,
+    transfer_shapekeys_parallel
+)
+from ..utils.sync_state import shape_key_hashes
 
 
 def _sync(self, context: bpy.types.Context, sync_head: bool, sync_body: bool, sync_clothes: bool):
@@ -18,6 +21,7 @@ def _sync(self, context: bpy.types.Context, sync_head: bool, sync_body: bool, sy
     print("Synchronization: Preparation...")
     keys = [item.shape_key_name for item in config.sync_shape_keys_to_transfer if item.checked]
     source_objects = dict()
+    source_hashes = dict()
     for item in config.edit_meshes:
         final = item.final_object
         basis = item.basis_object
@@ -27,22 +31,15 @@ def _sync(self, context: bpy.types.Context, sync_head: bool, sync_body: bool, sy
                 copy_shape_key(basis, final, sk_name)
             except (ValueError, AttributeError) as ex:
                 pass
-        if props.use_noise:
-            # Delete final delta noise key if it exists
-            remove_shape_key(basis, "DELTA_NOISE")
-            # Create a delta noise shape key
-            noise_sk = add_delta_noise_shape_key(
-                obj=basis,
-                shape_key_name="DELTA_NOISE",
-                min_limit=props.noise_min_value,
-                max_limit=props.noise_max_value
-            )
-        else:
-            noise_sk = None
         source_objects[item.edit_id] = basis
+        # Hash the source keys once per edit mesh; each target compares them with what it was last synced from
+        source_hashes[item.edit_id] = shape_key_hashes(basis, [final_sk.name] + keys)
 
     print("Synchronization: Preparation Complete")
 
+    # Transfers are collected first so they can run sequentially or in a worker pool
+    transfers = []
+
     # Sync head lods
     if sync_head:
         print("Synchronization: Processing Head LODs...")
@@ -57,15 +54,14 @@ def _sync(self, context: bpy.types.Context, sync_head: bool, sync_body: bool, sy
                     continue
                 target_obj = mesh_item.final_object
                 basis_object = mesh_item.basis_object
-                transfer_shapekeys(
-                    context=context,
+                transfers.append(dict(
                     target=target_obj,
                     proxy=basis_object,
                     source=source_obj,
                     basis_shape_key=final_sk.name,
-                    bind_key_name=noise_sk.name if noise_sk else None,
-                    shape_keys=keys
-                )
+                    shape_keys=keys,
+                    source_hashes=source_hashes.get(mesh_item.edit_id)
+                ))
         print("Synchronization: Processing Head LODs Complete")
     if sync_body:
         print("Synchronization: Processing Body LODs...")
@@ -81,15 +77,14 @@ def _sync(self, context: bpy.types.Context, sync_head: bool, sync_body: bool, sy
                     continue
                 target_obj = mesh_item.final_object
                 basis_object = mesh_item.basis_object
-                transfer_shapekeys(
-                    context=context,
+                transfers.append(dict(
                     target=target_obj,
                     proxy=basis_object,
                     source=source_obj,
                     basis_shape_key=final_sk.name,
-                    bind_key_name=noise_sk.name if noise_sk else None,
-                    shape_keys=keys
-                )
+                    shape_keys=keys,
+                    source_hashes=source_hashes.get(mesh_item.edit_id)
+                ))
         print("Synchronization: Processing Body LODs Complete")
 
     if sync_clothes:
@@ -102,17 +97,29 @@ def _sync(self, context: bpy.types.Context, sync_head: bool, sync_body: bool, sy
                     continue
                 target_obj = mesh_item.final_object
                 basis_object = mesh_item.basis_object
-                transfer_shapekeys(
-                    context=context,
+                transfers.append(dict(
                     target=target_obj,
                     proxy=basis_object,
                     source=source_obj,
                     basis_shape_key=final_sk.name,
-                    bind_key_name=noise_sk.name if noise_sk else None,
-                    shape_keys=keys
-                )
+                    shape_keys=keys,
+                    source_hashes=source_hashes.get(mesh_item.edit_id)
+                ))
         print("Synchronization: Processing cloth Complete")
 
+    if props.use_parallel and len(transfers) > 1:
+        print(f"Synchronization: Transferring {len(transfers)} meshes in parallel...")
+        transfer_shapekeys_parallel(
+            transfers,
+            workers=props.worker_count,
+            only_changed=props.only_changed,
+            use_processes=props.use_processes
+        )
+    else:
+        for transfer in transfers:
+            transfer_shapekeys(context=context, only_changed=props.only_changed, **transfer)
+    print("Synchronization: Transferring Complete")
+
     armatures_to_sync = []
     # Syncronize armatures
     if sync_head and config.fbx_head_armature:
@@ -141,32 +148,26 @@ class MRF_OT_synchronize(bpy.types.Operator):
     bl_label = "Sync Meshes"
     bl_options = {'REGISTER', 'UNDO'}
 
-    use_noise: bpy.props.BoolProperty(name="Add Noise", default=True, options={"HIDDEN"})
-    noise_min_value: bpy.props.FloatProperty(name="Min", default=5e-4, options={"HIDDEN"})
-    noise_max_value: bpy.props.FloatProperty(name="Max", default=1e-3, options={"HIDDEN"})
     sync_head: bpy.props.BoolProperty(name="Sync Head", default=True, options={"HIDDEN"})
     sync_body: bpy.props.BoolProperty(name="Sync Body", default=True, options={"HIDDEN"})
     sync_clothes: bpy.props.BoolProperty(name="Sync Clothes", default=True, options={"HIDDEN"})
-
-    _max_retries = 10
+    only_changed: bpy.props.BoolProperty(
+        name="Only Changed",
+        default=True,
+        description="Only re-transfer shape keys whose source data changed since the last synchronization",
+        options={"HIDDEN"}
+    )
+    use_parallel: bpy.props.BoolProperty(name="Parallel", default=True, options={"HIDDEN"})
+    worker_count: bpy.props.IntProperty(name="Workers", default=0, min=0, options={"HIDDEN"})
+    use_processes: bpy.props.BoolProperty(name="Processes", default=False, options={"HIDDEN"})
 
     def execute(self, context):
         try:
             config = context.scene.meta_reforge_config
             state = EditorState.capture_current_state()
             ensure_objects_visible(config.get_associated_objects())
-            num_retries = 0
-            while True:
-                try:
-                    num_retries += 1
-                    _sync(self, context, self.sync_head, self.sync_body, self.sync_clothes)
-                    break
-                except Exception as ex:
-                    if self.use_noise and num_retries < self._max_retries:
-                        print(f"Retry {num_retries}/{self._max_retries}: {str(ex)}")
-                    else:
-                        raise ex
-            
+            # The NumPy binding is deterministic, so there is no noisy bind state to retry with
+            _sync(self, context, self.sync_head, self.sync_body, self.sync_clothes)
             print("Synchronization complete")
             state.restore_state()
             return {'FINISHED'}         
@@ -171,26 +171,25 @@ class MRF_scene_config(bpy.types.PropertyGroup):
         type=MRF_shape_key_item
     )
     sync_active_shape_key: bpy.props.IntProperty(name="Active Shape Key")
-    sync_use_noise: bpy.props.BoolProperty(name="Use Noise", default=True)
-    sync_noise_min_value: bpy.props.FloatProperty(
-        name="Noise Min Value",
-        default=3e-4,
-        min=-1e-2,
-        max=1e-2,
-        step=10,
-        precision=6
-    )
-    sync_noise_max_value: bpy.props.FloatProperty(
-        name="Noise Max Value",
-        default=6e-4,
-        min=-1e-2,
-        max=1e-2,
-        step=100,
-        precision=6
-    )
     sync_head: bpy.props.BoolProperty(default=True, description="Synchronize Head")
     sync_body: bpy.props.BoolProperty(default=True, description="Synchronize Body")
     sync_clothes: bpy.props.BoolProperty(default=True, description="Synchronize Clothes")
+    sync_parallel: bpy.props.BoolProperty(
+        name="Parallel",
+        default=True,
+        description="Transfer shape keys of all LODs and clothes in a worker pool"
+    )
+    sync_workers: bpy.props.IntProperty(
+        name="Workers",
+        default=0,
+        min=0,
+        description="Number of parallel workers. 0 uses one worker per CPU core"
+    )
+    sync_use_processes: bpy.props.BoolProperty(
+        name="Processes",
+        default=False,
+        description="Fork worker processes instead of using threads. Not available on Windows and unsafe on macOS"
+    )
 
     # interpolate bone proportions
     origin_bone: bpy.props.StringProperty(name="Origin Bone")
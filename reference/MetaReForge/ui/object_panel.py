@@ -151,11 +151,6 @@ class MRF_PT_object_mode(bpy.types.Panel):
         box = layout.box()
         if dropdown(box, config.view_group, "show_update_section", "Update Original", icon_value=icons.get_icon("MRF_SYNC")):
             b = box.box()
-            b.prop(config, "sync_use_noise")
-            if config.sync_use_noise:
-                b.prop(config, "sync_noise_min_value", text="Min")
-                b.prop(config, "sync_noise_max_value", text="Max")
-
             col = b.column(align=True)
             col.label(text="Shape Keys:")
             col.template_list(
@@ -179,13 +174,22 @@ class MRF_PT_object_mode(bpy.types.Panel):
             row.prop(config, "sync_head", toggle=1, text="Head")
             row.prop(config, "sync_body", toggle=1, text="Body")
             row.prop(config, "sync_clothes", toggle=1, text="Clothes")
-            props = b.operator(MRF_OT_synchronize.bl_idname, text="Synchronize")
-            props.use_noise = config.sync_use_noise
-            props.noise_min_value = config.sync_noise_min_value
-            props.noise_max_value = config.sync_noise_max_value
-            props.sync_head = config.sync_head
-            props.sync_body = config.sync_body
-            props.sync_clothes = config.sync_clothes
+            row = b.row(align=True)
+            row.prop(config, "sync_parallel", toggle=1)
+            sub = row.row(align=True)
+            sub.enabled = config.sync_parallel
+            sub.prop(config, "sync_workers")
+            sub.prop(config, "sync_use_processes", toggle=1)
+            row = b.row(align=True)
+            for text, only_changed in (("Synchronize", True), ("Full Sync", False)):
+                props = row.operator(MRF_OT_synchronize.bl_idname, text=text)
+                props.sync_head = config.sync_head
+                props.sync_body = config.sync_body
+                props.sync_clothes = config.sync_clothes
+                props.only_changed = only_changed
+                props.use_parallel = config.sync_parallel
+                props.worker_count = config.sync_workers
+                props.use_processes = config.sync_use_processes
 
             b = box.box()
             
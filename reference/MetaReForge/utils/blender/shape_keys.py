@@ -1,4 +1,5 @@
 import bpy
+import numpy as np
 from typing import List, Dict
 
 
@@ -120,9 +121,9 @@ def join_as_shape(
         source_vertices = shape_keys.key_blocks[0].data
     else:
         source_vertices = source_obj.data.vertices
-    for i, vertex in enumerate(source_vertices):
-        # Apply the vertex position from the source object to the new shape key
-        sk.data[i].co = vertex.co
+    coordinates = np.empty(len(source_vertices) * 3, dtype=np.float32)
+    source_vertices.foreach_get("co", coordinates)
+    sk.data.foreach_set("co", coordinates)
 
     return sk
 
@@ -139,12 +140,17 @@ def copy_shape_key(
     if target_sk is None:
         target_sk = target.shape_key_add(name=shape_key, from_mix=False)
 
-    flattened_coordinates = [co for v in source_sk.data for co in v.co[:]]
     # Ensure the length matches
-    if len(flattened_coordinates) == 3 * len(target_sk.data):
-        target_sk.data.foreach_set("co", flattened_coordinates)
-    else:
+    if len(source_sk.data) != len(target_sk.data):
         raise ValueError("Mismatch in the number of vertices.")
+    coordinates = np.empty(len(source_sk.data) * 3, dtype=np.float32)
+    source_sk.data.foreach_get("co", coordinates)
+    current = np.empty_like(coordinates)
+    target_sk.data.foreach_get("co", current)
+    # Leave unchanged keys untouched so the copy does not mark the mesh as modified
+    if not np.array_equal(current, coordinates):
+        target_sk.data.foreach_set("co", coordinates)
+    return target_sk
     
 
 
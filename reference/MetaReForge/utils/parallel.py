@@ -0,0 +1,28 @@
+import os
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def create_executor(workers: int = 0, max_tasks: int = 0, use_processes: bool = False) -> Executor:
+    """
+    Creates a pool for CPU heavy NumPy work.
+
+    Threads are the default; they overlap the NumPy parts that release the GIL. Worker processes are
+    opt-in because they fork the running Blender, which is unsafe on macOS where the GUI process holds
+    Objective-C and GL state. They are forked so they inherit the loaded add-on and Blender's modules,
+    which a spawned child could not import, so threads are used wherever fork is not available.
+
+    Args:
+        workers (int, optional): Number of workers, 0 for one per CPU core. Defaults to 0.
+        max_tasks (int, optional): Number of tasks, used to avoid starting idle workers. Defaults to 0.
+        use_processes (bool, optional): Fork worker processes instead of starting threads. Defaults to False.
+
+    Returns:
+        Executor: The process or thread pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    if max_tasks:
+        workers = min(workers, max_tasks)
+    if use_processes and "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(max_workers=workers)
@@ -0,0 +1,270 @@
+import os
+import uuid
+import zipfile
+import hashlib
+import bpy
+import numpy as np
+from typing import Dict, Optional
+from mathutils.bvhtree import BVHTree
+
+
+def get_mesh_coordinates(obj: bpy.types.Object) -> np.ndarray:
+    """
+    Returns the base mesh vertex coordinates of an object as an (N, 3) float64 array.
+    """
+    vertices = obj.data.vertices
+    coordinates = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3).astype(np.float64)
+
+
+def get_shape_key_coordinates(shape_key: bpy.types.ShapeKey) -> np.ndarray:
+    """
+    Returns the coordinates stored in a shape key as an (N, 3) float64 array.
+    """
+    coordinates = np.empty(len(shape_key.data) * 3, dtype=np.float32)
+    shape_key.data.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3).astype(np.float64)
+
+
+def get_mesh_triangles(obj: bpy.types.Object) -> np.ndarray:
+    """
+    Returns the vertex indices of the mesh loop triangles as an (T, 3) int32 array.
+    """
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    return triangles.reshape(-1, 3)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(lengths, 1e-12)
+
+
+def vertex_normals(coordinates: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    Computes area weighted vertex normals of a triangle mesh.
+    """
+    a, b, c = (coordinates[triangles[:, i]] for i in range(3))
+    face_normals = np.cross(b - a, c - a)
+    normals = np.zeros_like(coordinates)
+    for i in range(3):
+        np.add.at(normals, triangles[:, i], face_normals)
+    return _normalize(normals)
+
+
+class SurfaceBinding:
+    """
+    A pure NumPy replacement for binding a proxy mesh to a source mesh with the Surface Deform modifier.
+
+    Every proxy vertex is attached to its nearest source triangle. The attachment is stored as barycentric
+    coordinates of the nearest point plus the remaining offset expressed in a local frame built from the
+    interpolated vertex normal and the triangle's first edge. Applying the binding to deformed source
+    coordinates rebuilds the frames and reproduces the proxy, so any number of shape keys can be
+    transferred without evaluating the depsgraph.
+
+    Attributes:
+        triangles (np.ndarray): (P, 3) source vertex indices of the triangle each proxy vertex is bound to.
+        weights (np.ndarray): (P, 3) barycentric weights of the bound points.
+        offsets (np.ndarray): (P, 3) offset coefficients along the tangent, bitangent and normal.
+        triangle_indices (np.ndarray): (T, 3) source triangles used for the vertex normals.
+    """
+
+    def __init__(self, triangles: np.ndarray, weights: np.ndarray, offsets: np.ndarray, triangle_indices: np.ndarray):
+        self.triangles = triangles
+        self.weights = weights
+        self.offsets = offsets
+        self.triangle_indices = triangle_indices
+
+    @staticmethod
+    def _frames(coordinates: np.ndarray, triangles: np.ndarray, weights: np.ndarray, normals: np.ndarray):
+        points = np.einsum('pi,pij->pj', weights, coordinates[triangles])
+        normal = _normalize(np.einsum('pi,pij->pj', weights, normals[triangles]))
+        edge = coordinates[triangles[:, 1]] - coordinates[triangles[:, 0]]
+        tangent = _normalize(edge - np.einsum('ij,ij->i', edge, normal)[:, None] * normal)
+        bitangent = np.cross(normal, tangent)
+        return points, tangent, bitangent, normal
+
+    @classmethod
+    def bind(cls, source_coordinates: np.ndarray, source_triangles: np.ndarray, proxy_coordinates: np.ndarray) -> "SurfaceBinding":
+        """
+        Binds proxy vertices to the nearest triangles of the source mesh.
+
+        Args:
+            source_coordinates (np.ndarray): (N, 3) source vertex positions in the bind state.
+            source_triangles (np.ndarray): (T, 3) source triangle vertex indices.
+            proxy_coordinates (np.ndarray): (P, 3) proxy vertex positions in the same space.
+
+        Returns:
+            SurfaceBinding: The computed binding.
+
+        Raises:
+            ValueError: If the source mesh has no faces.
+        """
+        if len(source_triangles) == 0:
+            raise ValueError("Source mesh has no faces to bind to")
+        bvh = BVHTree.FromPolygons(source_coordinates.tolist(), source_triangles.tolist(), all_triangles=True)
+        nearest = np.empty_like(proxy_coordinates)
+        indices = np.zeros(len(proxy_coordinates), dtype=np.int64)
+        for i, co in enumerate(proxy_coordinates):
+            location, _, index, _ = bvh.find_nearest(co)
+            if index is None:
+                raise ValueError(f"Unable to bind proxy vertex {i}")
+            nearest[i] = location
+            indices[i] = index
+        triangles = source_triangles[indices]
+        weights = cls._barycentric(nearest, *(source_coordinates[triangles[:, i]] for i in range(3)))
+        normals = vertex_normals(source_coordinates, source_triangles)
+        points, tangent, bitangent, normal = cls._frames(source_coordinates, triangles, weights, normals)
+        delta = proxy_coordinates - points
+        offsets = np.stack([np.einsum('ij,ij->i', delta, axis) for axis in (tangent, bitangent, normal)], axis=1)
+        return cls(triangles, weights, offsets, source_triangles)
+
+    @staticmethod
+    def _barycentric(points: np.ndarray, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+        v0, v1, v2 = b - a, c - a, points - a
+        d00 = np.einsum('ij,ij->i', v0, v0)
+        d01 = np.einsum('ij,ij->i', v0, v1)
+        d11 = np.einsum('ij,ij->i', v1, v1)
+        d20 = np.einsum('ij,ij->i', v2, v0)
+        d21 = np.einsum('ij,ij->i', v2, v1)
+        denominator = d00 * d11 - d01 * d01
+        degenerate = np.abs(denominator) <= 1e-20
+        denominator[degenerate] = 1.0
+        v = (d11 * d20 - d01 * d21) / denominator
+        w = (d00 * d21 - d01 * d20) / denominator
+        weights = np.stack((1.0 - v - w, v, w), axis=1)
+        weights[degenerate] = (1.0, 0.0, 0.0)
+        return weights
+
+    def apply(self, source_coordinates: np.ndarray) -> np.ndarray:
+        """
+        Returns the proxy vertex positions that follow the given source vertex positions.
+        """
+        normals = vertex_normals(source_coordinates, self.triangle_indices)
+        points, tangent, bitangent, normal = self._frames(source_coordinates, self.triangles, self.weights, normals)
+        return (
+            points
+            + self.offsets[:, 0, None] * tangent
+            + self.offsets[:, 1, None] * bitangent
+            + self.offsets[:, 2, None] * normal
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "triangles": self.triangles,
+            "weights": self.weights,
+            "offsets": self.offsets,
+            "triangle_indices": self.triangle_indices
+        }
+
+    @classmethod
+    def from_arrays(cls, data: Dict[str, np.ndarray]) -> "SurfaceBinding":
+        return cls(data["triangles"], data["weights"], data["offsets"], data["triangle_indices"])
+
+
+def source_to_proxy_matrix(source: bpy.types.Object, proxy: bpy.types.Object) -> np.ndarray:
+    """
+    Returns the 4x4 matrix that maps source local coordinates to proxy local coordinates.
+    """
+    return np.array(proxy.matrix_world.inverted() @ source.matrix_world, dtype=np.float64)
+
+
+def transform_coordinates(matrix: np.ndarray, coordinates: np.ndarray) -> np.ndarray:
+    return coordinates @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+BINDING_CACHE_EXTENSION = ".npz"
+BINDING_CACHE_MAX_ENTRIES = 512
+
+
+def get_binding_cache_directory() -> str:
+    return bpy.utils.user_resource('DATAFILES', path=os.path.join("meta_reforge", "bindings"), create=True)
+
+
+def binding_cache_key(
+        source_coordinates: np.ndarray,
+        source_triangles: np.ndarray,
+        proxy_coordinates: np.ndarray
+    ) -> str:
+    """
+    Hashes everything a binding depends on: the source topology and rest positions and the proxy rest positions.
+    """
+    digest = hashlib.sha1()
+    for array in (source_coordinates, proxy_coordinates):
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    digest.update(np.ascontiguousarray(source_triangles, dtype=np.int32).tobytes())
+    return digest.hexdigest()
+
+
+def load_cached_binding(key: str, directory: str) -> Optional[SurfaceBinding]:
+    path = os.path.join(directory, key + BINDING_CACHE_EXTENSION)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            binding = SurfaceBinding.from_arrays({name: data[name] for name in data.files})
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as ex:
+        print(f"Discarding unreadable binding cache entry {path}: {ex}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    # The modification time is used to evict the least recently used bindings
+    os.utime(path, None)
+    return binding
+
+
+def store_cached_binding(key: str, binding: SurfaceBinding, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{key}.{uuid.uuid4().hex}.tmp")
+    with open(temp_path, "wb") as file:
+        np.savez(file, **binding.to_arrays())
+    os.replace(temp_path, os.path.join(directory, key + BINDING_CACHE_EXTENSION))
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(BINDING_CACHE_EXTENSION):
+            path = os.path.join(directory, name)
+            entries.append((os.path.getmtime(path), path))
+    for _, path in sorted(entries)[:max(0, len(entries) - BINDING_CACHE_MAX_ENTRIES)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_surface_binding(
+        source_coordinates: np.ndarray,
+        source_triangles: np.ndarray,
+        proxy_coordinates: np.ndarray,
+        cache_directory: Optional[str] = None
+    ) -> SurfaceBinding:
+    """
+    Returns the binding of the proxy to the source, loading it from the disk cache when possible.
+
+    Args:
+        source_coordinates (np.ndarray): (N, 3) source rest positions in the proxy space.
+        source_triangles (np.ndarray): (T, 3) source triangle vertex indices.
+        proxy_coordinates (np.ndarray): (P, 3) proxy rest positions.
+        cache_directory (str, optional): Folder of the disk cache, see get_binding_cache_directory.
+                                         The cache is not used when None. Defaults to None.
+
+    Returns:
+        SurfaceBinding: The cached or newly computed binding.
+    """
+    if cache_directory is None:
+        return SurfaceBinding.bind(source_coordinates, source_triangles, proxy_coordinates)
+    key = binding_cache_key(source_coordinates, source_triangles, proxy_coordinates)
+    binding = load_cached_binding(key, cache_directory)
+    if binding is None:
+        binding = SurfaceBinding.bind(source_coordinates, source_triangles, proxy_coordinates)
+        try:
+            store_cached_binding(key, binding, cache_directory)
+        except OSError as ex:
+            print(f"Unable to cache surface binding: {ex}")
+    return binding
@@ -0,0 +1,61 @@
+import json
+import hashlib
+import bpy
+import numpy as np
+from typing import Dict, List
+
+SYNC_HASHES_PROPERTY = "mrf_sync_hashes"
+
+
+def hash_arrays(*arrays: np.ndarray) -> str:
+    """
+    Returns a SHA-1 digest of the shapes and float32/int32 contents of the given arrays.
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        if array.dtype.kind == "f":
+            array = array.astype(np.float32)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def combine_hashes(*hashes: str) -> str:
+    return hashlib.sha1("|".join(hashes).encode()).hexdigest()
+
+
+def shape_key_hashes(obj: bpy.types.Object, shape_key_names: List[str]) -> Dict[str, str]:
+    """
+    Computes a content hash for each named shape key of an object. Missing keys are left out.
+    """
+    hashes = dict()
+    if obj.data.shape_keys is None:
+        return hashes
+    coordinates = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    for name in shape_key_names:
+        key_block = obj.data.shape_keys.key_blocks.get(name)
+        if key_block is None:
+            continue
+        key_block.data.foreach_get("co", coordinates)
+        hashes[name] = hash_arrays(coordinates)
+    return hashes
+
+
+def get_sync_hashes(obj: bpy.types.Object) -> Dict[str, str]:
+    """
+    Returns the hashes of the source data each shape key of the object was last synchronized from.
+    """
+    try:
+        return json.loads(obj.get(SYNC_HASHES_PROPERTY, "{}"))
+    except (TypeError, ValueError):
+        return dict()
+
+
+def set_sync_hashes(obj: bpy.types.Object, hashes: Dict[str, str]) -> None:
+    obj[SYNC_HASHES_PROPERTY] = json.dumps(hashes, sort_keys=True)
+
+
+def clear_sync_hashes(obj: bpy.types.Object) -> None:
+    if SYNC_HASHES_PROPERTY in obj:
+        del obj[SYNC_HASHES_PROPERTY]
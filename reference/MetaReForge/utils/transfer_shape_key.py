@@ -1,12 +1,32 @@
 import bpy
 import bmesh
 import random
-from typing import List
+import numpy as np
+from concurrent.futures import as_completed
+from typing import Dict, List, Optional, Tuple
 from mathutils import Vector
 from .blender.shape_keys import (
     restore_sk_values,
     get_sk_values
 )
+from .surface_binding import (
+    get_surface_binding,
+    get_binding_cache_directory,
+    get_mesh_coordinates,
+    get_mesh_triangles,
+    get_shape_key_coordinates,
+    source_to_proxy_matrix,
+    transform_coordinates
+)
+from .sync_state import (
+    hash_arrays,
+    combine_hashes,
+    shape_key_hashes,
+    get_sync_hashes,
+    set_sync_hashes,
+    clear_sync_hashes
+)
+from .parallel import create_executor
 from mathutils.kdtree import KDTree
 
 def update_base_mesh(target: bpy.types.Object, new_coordinates: List[Vector]) -> None:
@@ -99,13 +119,20 @@ def transfer_shapekeys(
         surface_deform_params: dict = None,
         laplacian_deform: bool = False,
         laplacian_deform_params: dict = None,
-        laplacian_anchor_threshold: float = 0.1
+        laplacian_anchor_threshold: float = 0.1,
+        use_binding_cache: bool = True,
+        only_changed: bool = False,
+        source_hashes: Dict[str, str] = None
     ) -> None:
     """
     Transfers a shape key from a source object to a target object. The function 
     applies the shape key deformation from the source object to the target object, using 
     a target basis object with the same topology for intermediate calculations.
 
+    The proxy is bound to the source once with a NumPy surface binding, which is then applied to the
+    basis shape and every requested shape key without evaluating the depsgraph. Laplacian Deform and
+    custom Surface Deform parameters fall back to the modifier based transfer.
+
     Args:
         context (bpy.types.Context): The current context in Blender.
         target (bpy.types.Object): The object to which the shape key deformation is applied.
@@ -114,13 +141,274 @@ def transfer_shapekeys(
         source (bpy.types.Object): The object from which the shape key deformation is taken.
         source_key_name (str): The name of the shape key in the source object to be transferred.
         bind_key_name (str, optional): The name of the shape key used for fine-tuning the binding. 
-                                       Defaults to None.
+                                       Only the modifier based transfer applies it. Defaults to None.
+        use_binding_cache (bool, optional): Reuse proxy bindings stored on disk by previous runs.
+                                            Defaults to True.
+        only_changed (bool, optional): Skip the basis and shape keys whose source data and binding match
+                                       the hashes stored on the target by the previous transfer.
+                                       Defaults to False.
+        source_hashes (Dict[str, str], optional): Precomputed content hashes of the source shape keys.
+                                                  Missing entries are computed. Defaults to None.
+
+    Raises:
+        Exception: If the bind shape key is not found in the source object.
+        Exception: If the target shape key is not found in the source object.
+        ValueError: If the number of target and proxy vertices does not match.
+    """
+    if laplacian_deform or surface_deform_params:
+        return _transfer_shapekeys_with_modifiers(
+            context, target, proxy, source,
+            basis_shape_key=basis_shape_key,
+            bind_key_name=bind_key_name,
+            shape_keys=shape_keys,
+            surface_deform_params=surface_deform_params,
+            laplacian_deform=laplacian_deform,
+            laplacian_deform_params=laplacian_deform_params,
+            laplacian_anchor_threshold=laplacian_anchor_threshold
+        )
+
+    if bpy.context.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode='OBJECT')
+    job = prepare_transfer_job(
+        target, proxy, source,
+        basis_shape_key=basis_shape_key,
+        bind_key_name=bind_key_name,
+        shape_keys=shape_keys,
+        only_changed=only_changed,
+        source_hashes=source_hashes,
+        cache_directory=get_binding_cache_directory() if use_binding_cache else None
+    )
+    if job is not None:
+        write_transfer_result(target, job, run_transfer_job(job))
+
+
+class ShapeKeyTransferJob:
+    """
+    The data a NumPy shape key transfer needs, read from Blender up front so that the math can run
+    outside the main thread or in a worker process.
+
+    Attributes:
+        source_basis (np.ndarray): (N, 3) source basis in the proxy space.
+        source_triangles (np.ndarray): (T, 3) source triangle vertex indices.
+        proxy_coordinates (np.ndarray): (P, 3) proxy rest positions.
+        basis_shape_key (str): Source key that becomes the target base mesh, None if it is up to date.
+        shape_keys (Dict[str, Tuple[np.ndarray, np.ndarray]]): Sparse source offsets in the proxy space
+            (vertex indices and deltas) for every key to evaluate, including the basis shape key.
+        hashes (Dict[str, str]): Hashes to store on the target once the results are written.
+        cache_directory (str): Binding cache folder or None.
+    """
+
+    def __init__(
+            self,
+            source_basis: np.ndarray,
+            source_triangles: np.ndarray,
+            proxy_coordinates: np.ndarray,
+            basis_shape_key: Optional[str],
+            shape_keys: Dict[str, Tuple[np.ndarray, np.ndarray]],
+            hashes: Dict[str, str],
+            cache_directory: Optional[str]
+        ):
+        self.source_basis = source_basis
+        self.source_triangles = source_triangles
+        self.proxy_coordinates = proxy_coordinates
+        self.basis_shape_key = basis_shape_key
+        self.shape_keys = shape_keys
+        self.hashes = hashes
+        self.cache_directory = cache_directory
+
+
+def prepare_transfer_job(
+        target: bpy.types.Object,
+        proxy: bpy.types.Object,
+        source: bpy.types.Object,
+        basis_shape_key: str = None,
+        bind_key_name: str = None,
+        shape_keys: List[str] = None,
+        only_changed: bool = False,
+        source_hashes: Dict[str, str] = None,
+        cache_directory: Optional[str] = None
+    ) -> Optional[ShapeKeyTransferJob]:
+    """
+    Reads everything a transfer needs from Blender and works out which shapes are out of date.
+    Arguments match transfer_shapekeys.
+
+    Returns:
+        ShapeKeyTransferJob: The job, or None when the target is already up to date.
 
     Raises:
         Exception: If the bind shape key is not found in the source object.
-        Exception: If unable to bind the Surface Deform modifier.
         Exception: If the target shape key is not found in the source object.
     """
+    source_key_blocks = source.data.shape_keys.key_blocks if source.data.shape_keys else {}
+    if bind_key_name and source_key_blocks.get(bind_key_name) is None:
+        raise Exception("Cannot find bind shape key")
+    if source.data.shape_keys:
+        source_basis = get_shape_key_coordinates(source.data.shape_keys.reference_key)
+    else:
+        source_basis = get_mesh_coordinates(source)
+
+    if basis_shape_key and source_key_blocks.get(basis_shape_key) is None:
+        raise Exception("Cannot find target shape key")
+    shape_keys = [name for name in (shape_keys if shape_keys else list()) if source_key_blocks.get(name) is not None]
+
+    matrix = source_to_proxy_matrix(source, proxy)
+    source_triangles = get_mesh_triangles(source)
+    proxy_coordinates = get_mesh_coordinates(proxy)
+
+    # Every transferred shape depends on the binding inputs and on the source key it is evaluated from
+    names = ([basis_shape_key] if basis_shape_key else []) + shape_keys
+    binding_hash = hash_arrays(source_basis, source_triangles, proxy_coordinates, matrix)
+    source_hashes = dict(source_hashes) if source_hashes else dict()
+    source_hashes.update(shape_key_hashes(source, [name for name in names if name not in source_hashes]))
+    new_hashes = {name: combine_hashes(binding_hash, source_hashes[name]) for name in names}
+    hashes = get_sync_hashes(target) if only_changed else dict()
+    target_key_blocks = target.data.shape_keys.key_blocks if target.data.shape_keys else {}
+    basis_dirty = bool(basis_shape_key) and hashes.get(basis_shape_key) != new_hashes[basis_shape_key]
+    # Rewriting the base mesh offsets the target's other shape keys, so all of them are refreshed then
+    dirty_keys = [
+        name for name in shape_keys
+        if basis_dirty or hashes.get(name) != new_hashes[name] or target_key_blocks.get(name) is None
+    ]
+    if not basis_dirty and not dirty_keys:
+        return None
+    for name in ([basis_shape_key] if basis_dirty else []) + dirty_keys:
+        hashes[name] = new_hashes[name]
+
+    # Keys are shipped as sparse offsets: most of them move a small part of the mesh.
+    # The binding does not need the bind key to separate coincident vertices, so it is made against the
+    # clean basis. Random noise in the bind state would otherwise make every binding cache key unique.
+    offsets = dict()
+    for name in ([basis_shape_key] if basis_dirty else []) + dirty_keys:
+        deltas = get_shape_key_coordinates(source_key_blocks[name]) - source_basis
+        indices = np.flatnonzero(np.any(deltas != 0.0, axis=1))
+        offsets[name] = (indices, deltas[indices] @ matrix[:3, :3].T)
+    return ShapeKeyTransferJob(
+        transform_coordinates(matrix, source_basis),
+        source_triangles,
+        proxy_coordinates,
+        basis_shape_key if basis_dirty else None,
+        offsets,
+        hashes,
+        cache_directory
+    )
+
+
+def run_transfer_job(job: ShapeKeyTransferJob) -> Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Evaluates every shape of a job through the surface binding. Does not touch Blender data.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]: The proxy evaluated at the source basis
+            and, per key, the proxy vertices that differ from it with their new positions.
+    """
+    binding = get_surface_binding(job.source_basis, job.source_triangles, job.proxy_coordinates, job.cache_directory)
+    rest = binding.apply(job.source_basis)
+    results = dict()
+    shape = job.source_basis.copy()
+    for name, (indices, deltas) in job.shape_keys.items():
+        shape[indices] += deltas
+        coordinates = binding.apply(shape)
+        shape[indices] = job.source_basis[indices]
+        changed = np.flatnonzero(np.any(coordinates != rest, axis=1))
+        results[name] = (changed, coordinates[changed].astype(np.float32))
+    return rest.astype(np.float32), results
+
+
+def write_transfer_result(
+        target: bpy.types.Object,
+        job: ShapeKeyTransferJob,
+        result: Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]
+    ) -> None:
+    """
+    Writes the result of run_transfer_job to the target. Must run on the main thread.
+
+    Raises:
+        ValueError: If the number of target and proxy vertices does not match.
+    """
+    rest, results = result
+    if len(rest) != len(target.data.vertices):
+        raise ValueError("Mismatch in the number of vertices.")
+    coordinates = np.empty_like(rest)
+
+    def expand(name: str) -> np.ndarray:
+        indices, values = results[name]
+        coordinates[:] = rest
+        coordinates[indices] = values
+        return coordinates
+
+    # Update base mesh
+    if job.basis_shape_key:
+        update_base_mesh(target, expand(job.basis_shape_key))
+
+    # Update shape keys
+    for sk_name in job.shape_keys:
+        if sk_name == job.basis_shape_key:
+            continue
+        if target.data.shape_keys is None:
+            target.shape_key_add(name="Basis", from_mix=False)
+        target_sk = target.data.shape_keys.key_blocks.get(sk_name)
+        if target_sk is None:
+            target_sk = target.shape_key_add(name=sk_name, from_mix=False)
+        target_sk.data.foreach_set("co", expand(sk_name).ravel())
+    target.data.update()
+    set_sync_hashes(target, job.hashes)
+
+
+def transfer_shapekeys_parallel(
+        transfers: List[Dict],
+        workers: int = 0,
+        use_binding_cache: bool = True,
+        only_changed: bool = False,
+        use_processes: bool = False
+    ) -> None:
+    """
+    Runs several independent NumPy shape key transfers in a worker pool.
+
+    Jobs are prepared on the main thread, evaluated in worker threads (or forked worker processes when
+    requested) and written back on the main thread as they complete.
+
+    Args:
+        transfers (List[Dict]): Keyword arguments of prepare_transfer_job for each target
+                                (target, proxy, source, basis_shape_key, bind_key_name, shape_keys, source_hashes).
+        workers (int, optional): Number of workers, 0 for one per CPU core. Defaults to 0.
+        use_binding_cache (bool, optional): Reuse proxy bindings stored on disk. Defaults to True.
+        only_changed (bool, optional): Skip shapes that are up to date. Defaults to False.
+        use_processes (bool, optional): Fork worker processes instead of starting threads. Defaults to False.
+    """
+    if bpy.context.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode='OBJECT')
+    cache_directory = get_binding_cache_directory() if use_binding_cache else None
+    jobs = []
+    for transfer in transfers:
+        job = prepare_transfer_job(only_changed=only_changed, cache_directory=cache_directory, **transfer)
+        if job is not None:
+            jobs.append((transfer["target"], job))
+    if not jobs:
+        return
+    with create_executor(workers, len(jobs), use_processes) as executor:
+        futures = {executor.submit(run_transfer_job, job): (target, job) for target, job in jobs}
+        for future in as_completed(futures):
+            target, job = futures[future]
+            write_transfer_result(target, job, future.result())
+
+
+def _transfer_shapekeys_with_modifiers(
+        context: bpy.types.Context,
+        target: bpy.types.Object,
+        proxy: bpy.types.Object,
+        source: bpy.types.Object,
+        basis_shape_key: str = None,
+        bind_key_name: str = None,
+        shape_keys: List[str] = None,
+        surface_deform_params: dict = None,
+        laplacian_deform: bool = False,
+        laplacian_deform_params: dict = None,
+        laplacian_anchor_threshold: float = 0.1
+    ) -> None:
+    """
+    Modifier based implementation of transfer_shapekeys. Used when Laplacian Deform or custom
+    Surface Deform parameters are requested, which the NumPy binding does not reproduce.
+    """
 
     bpy.ops.object.select_all(action="DESELECT")
     context.view_layer.objects.active = proxy
@@ -263,3 +551,5 @@ def transfer_shapekeys(
     # Restore shape key values and "pin" state
     restore_sk_values(source, sk_values)
     source.show_only_shape_key = source_obj_show_only_shape_key
+    # The modifier path does not track what it wrote, so the next incremental transfer starts over
+    clear_sync_hashes(target)